@@ -1,4 +1,6 @@
+import threading
 from abc import ABC, abstractmethod
+from typing import Optional
 
 
 ############# Abstract classes #############
@@ -23,6 +25,18 @@ class Creator(ABC):
     implementation of this method.
     """
 
+    def __init__(self, cache: bool = False):
+        """
+        With `cache` on, the creator creates its product once(lazily, on the first call) and remembers the result of
+        some_operation(). That only makes sense when the product is immutable, that's why it's opt-in. Call
+        invalidate() when the cached result is no longer right.
+        """
+
+        self.cache = cache
+        self._product: Optional[Product] = None
+        self._result: Optional[str] = None
+        self._lock = threading.Lock()
+
     @abstractmethod
     def factory_method(self) -> Product:
         """
@@ -41,12 +55,39 @@ class Creator(ABC):
         factory method and returning a different type of product from it.
         """
 
-        product = self.factory_method()
+        if not self.cache:
+            return self._operation(self.factory_method())
 
-        result = f"Creator: The same creator's code has just worked with {product.operation()}"
+        # Fast path: once the result is cached, concurrent callers just read it without taking the lock.
+        result = self._result
+
+        if result is None:
+            with self._lock:
+                # another thread may have computed it while we were waiting for the lock.
+                if self._result is None:
+                    if self._product is None:
+                        self._product = self.factory_method()
+
+                    self._result = self._operation(self._product)
+
+                result = self._result
 
         return result
 
+    def invalidate(self, product: bool = False) -> None:
+        """
+        Drops the cached result of some_operation(), and the cached product too if `product` is True.
+        """
+
+        with self._lock:
+            self._result = None
+
+            if product:
+                self._product = None
+
+    def _operation(self, product: Product) -> str:
+        return f"Creator: The same creator's code has just worked with {product.operation()}"
+
 
 ##########################
 
@@ -64,12 +105,12 @@ class ConcreteCreator1(Creator):
     """
 
     def factory_method(self) -> Product:
-        pass
+        return ConcreteProduct1()
 
 
 class ConcreteCreator2(Creator):
     def factory_method(self):
-        pass
+        return ConcreteProduct2()
 
 
 class ConcreteProduct1(Product):
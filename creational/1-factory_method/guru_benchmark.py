@@ -0,0 +1,59 @@
+import threading
+import timeit
+
+from guru import ConcreteCreator1
+
+# Run it from this directory: python guru_benchmark.py
+
+NUMBER = 1_000_000
+
+
+def benchmark_cache():
+    """
+    Calls per second of some_operation() with the cache off(a new product and a new result string per call) and on.
+    """
+
+    print(f"{'cache':>6} {'calls/s':>14}")
+
+    for cache in [False, True]:
+        creator = ConcreteCreator1(cache=cache)
+        elapsed = timeit.timeit(creator.some_operation, number=NUMBER)
+
+        print(f"{str(cache):>6} {NUMBER / elapsed:>14,.0f}")
+
+
+def check_concurrent_callers():
+    """
+    Many threads calling some_operation() on a cold creator at the same time must all get the same result, made from
+    a single product.
+    """
+
+    created = []
+
+    class CountingCreator(ConcreteCreator1):
+        def factory_method(self):
+            created.append(1)
+            return super().factory_method()
+
+    creator = CountingCreator(cache=True)
+    results = []
+    barrier = threading.Barrier(32)
+
+    def call():
+        barrier.wait()
+        results.append(creator.some_operation())
+
+    threads = [threading.Thread(target=call) for _ in range(32)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    print(f"\n32 concurrent callers: {len(created)} product created, {len(set(map(id, results)))} distinct result")
+
+
+if __name__ == "__main__":
+    benchmark_cache()
+    check_concurrent_callers()
@@ -1,5 +1,13 @@
+import asyncio
+import contextlib
+import queue
+import threading
 from abc import ABC, abstractmethod
+from array import array
+from collections.abc import MutableSequence
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Type
 
 # Pros of this pattern:
 # 1. If we don't use this pattern, we could have complex object creations using new() and it could be that one object requires
@@ -14,6 +22,19 @@ class Burger(ABC):
         self.sauce = ""
         self.toppings = []
 
+    def get_name(self) -> str:
+        return self.name
+
+    def reset(self):
+        """
+        Brings a used burger back to the state it had right after __init__(), so a pool can hand it out again. The
+        toppings list is cleared in place instead of being rebuilt.
+        """
+
+        self.bread = ""
+        self.sauce = ""
+        self.toppings.clear()
+
     @abstractmethod
     def prepare(self):
         pass
@@ -26,6 +47,18 @@ class Burger(ABC):
     def serve(self):
         pass
 
+    # Awaitable versions of the hooks, used by AsyncBurgerStore. By default they just run the regular hooks, burgers
+    # with stages that wait on something(I/O, a timer, ...) override them to await it instead of blocking the loop.
+
+    async def aprepare(self):
+        self.prepare()
+
+    async def acook(self):
+        self.cook()
+
+    async def aserve(self):
+        self.serve()
+
 
 class Burgers(Enum):
     CHEESE = "CHEESE"
@@ -98,11 +131,415 @@ class DeluxeVeganBurger(Burger):
         pass
 
 
+############# Compact burgers #############
+
+# A regular burger carries a __dict__ and a toppings list per instance. With millions of open orders, that's way more
+# memory than the data needs, so here are two compact representations of burgers that still follow the Burger
+# interface(they're registered as virtual subclasses of Burger).
+#
+# They don't have their own prepare/cook/serve logic. They keep the burger's `kind`(CheeseBurger, VeganBurger, ...)
+# and run that class's hooks on themselves, so they behave like the regular burger of that kind.
+
+class _KindBurger:
+    __slots__ = ()
+
+    def get_name(self) -> str:
+        return self.name
+
+    def prepare(self):
+        return self.kind.prepare(self)
+
+    def cook(self):
+        return self.kind.cook(self)
+
+    def serve(self):
+        return self.kind.serve(self)
+
+    def aprepare(self):
+        return self.kind.aprepare(self)
+
+    def acook(self):
+        return self.kind.acook(self)
+
+    def aserve(self):
+        return self.kind.aserve(self)
+
+
+class CompactBurger(_KindBurger):
+    """
+    A burger of the given kind that uses __slots__ instead of a per-instance __dict__.
+
+    store.register(Burgers.CHEESE, lambda: CompactBurger(CheeseBurger))
+    """
+
+    __slots__ = ("kind", "name", "bread", "sauce", "toppings")
+
+    _templates: Dict[Type[Burger], Burger] = {}  # kind -> a regular burger of that kind, to copy the defaults from
+
+    def __init__(self, kind: Type[Burger]):
+        template = self._templates.get(kind)
+
+        if template is None:
+            template = self._templates[kind] = kind()
+
+        self.kind = kind
+        self.name = template.name
+        self.bread = template.bread
+        self.sauce = template.sauce
+        self.toppings = list(template.toppings)
+
+    reset = Burger.reset
+
+
+class BurgerBatch:
+    """
+    Stores a lot of burgers column by column instead of as objects. The names, breads and sauces are interned: each
+    distinct string is stored once and the columns only hold its code. The toppings of all burgers are stored in one
+    flat array of codes, and `offsets` tells where the toppings of each burger start and end.
+
+    batch[i] gives a BurgerView, which reads and writes the columns of the i-th burger through the Burger interface.
+    Rewriting the toppings of a burger in the flat array would shift the toppings of all the burgers after it, so a
+    burger whose toppings are written to gets its own array in `overflow` instead, which then takes precedence over its
+    row of the flat array. compact() moves the overflow back into the flat array in one pass. It runs on its own once
+    the overflow holds as many burgers as a fraction of the batch, so writes cost O(1) amortized(plus the length of
+    the burger's toppings).
+    """
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.codes: Dict[str, int] = {}  # string -> its index in `strings`
+        self.kinds: List[Type[Burger]] = []
+        self.kind_codes: Dict[Type[Burger], int] = {}
+
+        self.kind = array("I")
+        self.name = array("I")
+        self.bread = array("I")
+        self.sauce = array("I")
+        self.toppings = array("I")
+        self.offsets = array("I", [0])  # toppings of burger i are toppings[offsets[i]:offsets[i + 1]]
+        self.overflow: Dict[int, array] = {}  # index of a burger -> its toppings, when they were written to
+
+    def intern(self, string: str) -> int:
+        code = self.codes.get(string)
+
+        if code is None:
+            code = self.codes[string] = len(self.strings)
+            self.strings.append(string)
+
+        return code
+
+    def append(self, burger: Burger) -> int:
+        """
+        Copies the burger into the batch and returns its index.
+        """
+
+        kind = getattr(burger, "kind", type(burger))
+        kind_code = self.kind_codes.get(kind)
+
+        if kind_code is None:
+            kind_code = self.kind_codes[kind] = len(self.kinds)
+            self.kinds.append(kind)
+
+        self.kind.append(kind_code)
+        self.name.append(self.intern(burger.name))
+        self.bread.append(self.intern(burger.bread))
+        self.sauce.append(self.intern(burger.sauce))
+        self.toppings.extend(self.intern(topping) for topping in burger.toppings)
+        self.offsets.append(len(self.toppings))
+
+        return len(self.kind) - 1
+
+    def row_toppings(self, index: int) -> array:
+        """
+        The topping codes of the burger at `index`. Don't write to them, see writable_toppings().
+        """
+
+        codes = self.overflow.get(index)
+
+        if codes is None:
+            codes = self.toppings[self.offsets[index]:self.offsets[index + 1]]
+
+        return codes
+
+    def writable_toppings(self, index: int) -> array:
+        """
+        The topping codes of the burger at `index`, in its overflow array, which can be written to in place.
+        """
+
+        codes = self.overflow.get(index)
+
+        if codes is None:
+            # Compacting costs O(len(self)), so doing it every len(self) / 4 new overflow arrays is O(1) amortized.
+            if len(self.overflow) >= 1_024 + len(self) // 4:
+                self.compact()
+
+            codes = self.overflow[index] = self.toppings[self.offsets[index]:self.offsets[index + 1]]
+
+        return codes
+
+    def compact(self) -> None:
+        """
+        Moves the toppings in the overflow back into the flat array.
+        """
+
+        if not self.overflow:
+            return
+
+        toppings = array("I")
+        offsets = array("I", [0])
+        overflow = self.overflow
+        old_toppings, old_offsets = self.toppings, self.offsets
+
+        for index in range(len(self)):
+            codes = overflow.get(index)
+
+            if codes is None:
+                toppings.extend(old_toppings[old_offsets[index]:old_offsets[index + 1]])
+            else:
+                toppings.extend(codes)
+
+            offsets.append(len(toppings))
+
+        self.toppings, self.offsets, self.overflow = toppings, offsets, {}
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def __getitem__(self, index: int) -> "BurgerView":
+        if not -len(self) <= index < len(self):
+            raise IndexError("burger index out of range")
+
+        return BurgerView(self, index % len(self))
+
+    def __iter__(self) -> Iterator["BurgerView"]:
+        for index in range(len(self)):
+            yield BurgerView(self, index)
+
+
+class _BatchToppings(MutableSequence):
+    """
+    The toppings of a BurgerView, as a list. Writing to it writes to the burger's overflow array in the batch, see
+    BurgerBatch.
+    """
+
+    __slots__ = ("view",)
+
+    def __init__(self, view: "BurgerView"):
+        self.view = view
+
+    def _codes(self) -> array:
+        return self.view.batch.row_toppings(self.view.index)
+
+    def _writable(self) -> array:
+        return self.view.batch.writable_toppings(self.view.index)
+
+    def __getitem__(self, index):
+        strings = self.view.batch.strings
+
+        if isinstance(index, slice):
+            return [strings[code] for code in self._codes()[index]]
+
+        return strings[self._codes()[index]]
+
+    def __setitem__(self, index, value):
+        intern = self.view.batch.intern
+
+        if isinstance(index, slice):
+            self._writable()[index] = array("I", map(intern, value))
+        else:
+            self._writable()[index] = intern(value)
+
+    def __delitem__(self, index):
+        del self._writable()[index]
+
+    def __len__(self) -> int:
+        return len(self._codes())
+
+    def insert(self, index: int, value: str):
+        self._writable().insert(index, self.view.batch.intern(value))
+
+    def append(self, value: str):
+        self._writable().append(self.view.batch.intern(value))
+
+    def extend(self, values: Iterable[str]):
+        self._writable().extend(map(self.view.batch.intern, values))
+
+    def __eq__(self, other):
+        return self.view._get_toppings() == (list(other) if isinstance(other, (list, tuple, _BatchToppings)) else other)
+
+    def __repr__(self) -> str:
+        return repr(self.view._get_toppings())
+
+
+class BurgerView(_KindBurger):
+    """
+    One burger of a BurgerBatch. Its toppings are a list-like view of the burger's row in the flat toppings array.
+    """
+
+    __slots__ = ("batch", "index")
+
+    def __init__(self, batch: BurgerBatch, index: int):
+        self.batch = batch
+        self.index = index
+
+    def _get(self, column: array) -> str:
+        return self.batch.strings[column[self.index]]
+
+    def _set(self, column: array, value: str):
+        column[self.index] = self.batch.intern(value)
+
+    @property
+    def kind(self) -> Type[Burger]:
+        return self.batch.kinds[self.batch.kind[self.index]]
+
+    name = property(lambda self: self._get(self.batch.name), lambda self, value: self._set(self.batch.name, value))
+    bread = property(lambda self: self._get(self.batch.bread), lambda self, value: self._set(self.batch.bread, value))
+    sauce = property(lambda self: self._get(self.batch.sauce), lambda self, value: self._set(self.batch.sauce, value))
+
+    @property
+    def toppings(self) -> _BatchToppings:
+        return _BatchToppings(self)
+
+    @toppings.setter
+    def toppings(self, toppings: Iterable[str]):
+        self._set_toppings(list(toppings))
+
+    def reset(self):
+        self.bread = ""
+        self.sauce = ""
+        self._set_toppings([])
+
+    def _get_toppings(self) -> List[str]:
+        strings = self.batch.strings
+
+        return [strings[code] for code in self.batch.row_toppings(self.index)]
+
+    def _set_toppings(self, toppings: List[str]):
+        self.batch.writable_toppings(self.index)[:] = array("I", map(self.batch.intern, toppings))
+
+
+Burger.register(CompactBurger)
+Burger.register(BurgerView)
+
+##########################
+
+
+_DONE = object()  # marks the end of the orders flowing through the pipeline
+
+
+class _Failed:
+    """
+    Carries an exception raised while making an order down the pipeline, so that it's raised on the caller's side.
+    """
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class BurgerPool:
+    """
+    Keeps a free list of released burgers per burger type. Instead of creating a new burger for every order and
+    throwing it away once the client is done with it, the store takes a burger from the free list(a hit) and only
+    creates a new one when the free list is empty(a miss).
+
+    Each free list holds at most `max_size` burgers, burgers released into a full free list are just dropped.
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+        self._free: Dict[Burgers, List[Burger]] = {}  # Burgers -> free list
+
+    def acquire(self, item: Burgers, constructor: Callable[[], Burger]) -> Burger:
+        free = self._free.get(item)
+
+        if free:
+            self.hits += 1
+            return free.pop()
+
+        self.misses += 1
+        return constructor()
+
+    def release(self, item: Burgers, burger: Burger) -> None:
+        free = self._free.setdefault(item, [])
+
+        if len(free) >= self.max_size:
+            self.dropped += 1
+            return
+
+        burger.reset()
+        free.append(burger)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "dropped": self.dropped,
+            "pooled": sum(len(free) for free in self._free.values()),
+        }
+
+
 class BurgerStore(ABC):
+    """
+    Instead of every store picking the class with a chain of if/elif checks(which gets slower and has to be edited with
+    every new burger), each store keeps a dispatch table of Burgers -> constructor. Burgers are plugged into a store by
+    registering them, so create_burger() is a single dict lookup no matter how many burger types the store sells. A
+    store inherits the burgers registered on its parent when it's defined.
+    """
 
-    @abstractmethod
-    def create_burger(self, item: Burgers) -> Burger:
-        pass
+    _registry: Dict[Burgers, Callable[[], Burger]] = {}  # Burgers -> constructor
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # every store gets its own copy of its parent's table, so it sells what its parent sells, and registering a
+        # burger on one store doesn't leak into the other stores.
+        cls._registry = dict(cls._registry)
+
+    @classmethod
+    def register(cls, item: Burgers, constructor: Optional[Callable[[], Burger]] = None):
+        """
+        Registers the constructor of a burger type on this store. Can also be used as a class decorator:
+
+        @VeganBurgerStore.register(Burgers.VEGAN)
+        class VeganBurger(Burger): ...
+        """
+
+        if constructor is None:
+            def decorator(constructor: Callable[[], Burger]):
+                cls._registry[item] = constructor
+                return constructor
+
+            return decorator
+
+        cls._registry[item] = constructor
+        return constructor
+
+    def __init__(self, pool: Optional[BurgerPool] = None):
+        """
+        Pass a BurgerPool to run the store in pooled mode. In that mode, burgers are recycled: a burger given back with
+        release() is reset and handed out to a later order of the same type. The burger returned by order_burger() is
+        the caller's until it releases it(a burger that's never released is just not recycled), and ordered_burger()
+        releases it at the end of a with block:
+
+        with store.ordered_burger(Burgers.VEGAN) as burger:
+            ...
+        """
+
+        self.pool = pool
+
+    def create_burger(self, item: Burgers) -> Optional[Burger]:
+        constructor = self._registry.get(item)
+
+        if constructor is None:
+            return None
+
+        if self.pool is not None:
+            return self.pool.acquire(item, constructor)
+
+        return constructor()
 
     def order_burger(self, type: Burgers) -> Burger:
         burger = self.create_burger(type)
@@ -110,25 +547,289 @@ class BurgerStore(ABC):
         burger.prepare()
         burger.cook()
         burger.serve()
+
         return burger
 
+    def release(self, type: Burgers, burger: Burger) -> None:
+        """
+        Gives a burger of the given type back to the pool, once the caller is done with it. Don't use the burger
+        afterwards. Does nothing when the store isn't pooled.
+        """
+
+        if self.pool is not None:
+            self.pool.release(type, burger)
+
+    @contextlib.contextmanager
+    def ordered_burger(self, type: Burgers) -> Iterator[Burger]:
+        """
+        order_burger() for a with block, that releases the burger when the block is done.
+        """
+
+        burger = self.order_burger(type)
+
+        try:
+            yield burger
+        finally:
+            self.release(type, burger)
 
-class CheeseBurgerStore(ABC):
-    @abstractmethod
-    def create_burger(self, item: Burgers) -> Burger:
-        if item == Burgers.CHEESE:
-            return CheeseBurger()
+    def order_burgers(self, types: Iterable[Burgers], ordered: bool = True, workers: int = 1,
+                      queue_size: int = 16) -> Iterator[Burger]:
+        """
+        The batch version of order_burger(). Instead of making the orders one by one, prepare(), cook() and serve() run
+        as the stages of a pipeline, each stage on its own threads(`workers` per stage) and connected to the next one
+        through a queue of at most `queue_size` orders. So while one burger is being cooked, the next one is already
+        being prepared, and the throughput depends on the slowest stage instead of the sum of all of them.
+
+        Burgers are yielded in the order of `types` when `ordered` is True, otherwise as soon as they're served.
+
+        Note: a slow consumer of the returned generator fills up the queues and that pauses the whole pipeline, so we
+        never hold more than a few queues' worth of orders in memory. In pooled mode, the same rule as order_burger()
+        applies: the yielded burger goes back to the pool when you ask for the next one.
+        """
+
+        stop = threading.Event()
+        stages: List[Callable[[Burger], None]] = [
+            lambda burger: burger.prepare(),
+            lambda burger: burger.cook(),
+            lambda burger: burger.serve(),
+        ]
+        queues = [queue.Queue(queue_size) for _ in range(len(stages) + 1)]
+        running = [workers] * len(stages)  # workers of each stage that haven't seen _DONE yet
+        lock = threading.Lock()
+
+        def put(q: queue.Queue, item) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+
+            return False
+
+        def get(q: queue.Queue):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+            return _DONE
+
+        def feed():
+            try:
+                for seq, type in enumerate(types):
+                    burger = self.create_burger(type)
+
+                    if burger is None:
+                        raise ValueError(f"{self.__class__.__name__} doesn't sell {type}")
+
+                    print(f"--- Making a {burger.get_name()} ---")
+
+                    if not put(queues[0], (seq, type, burger)):
+                        return
+            except BaseException as error:
+                put(queues[0], (None, None, _Failed(error)))
+
+            for _ in range(workers):
+                put(queues[0], _DONE)
+
+        def work(index: int):
+            stage, inbox, outbox = stages[index], queues[index], queues[index + 1]
+
+            while True:
+                item = get(inbox)
+
+                if item is _DONE:
+                    break
+
+                seq, type, burger = item
+
+                if not isinstance(burger, _Failed):
+                    try:
+                        stage(burger)
+                    except BaseException as error:
+                        burger = _Failed(error)
+
+                if not put(outbox, (seq, type, burger)):
+                    return
 
-        if item == Burgers.DELUXECHEESE:
-            return DeluxeCheeseBurger()
+            with lock:
+                running[index] -= 1
+                last = running[index] == 0
+
+            # the last worker of a stage to finish tells the next stage(or the caller) that there's nothing left.
+            if last:
+                for _ in range(workers if index + 1 < len(stages) else 1):
+                    put(outbox, _DONE)
+
+        executor = ThreadPoolExecutor(max_workers=1 + workers * len(stages))
+
+        try:
+            executor.submit(feed)
+
+            for index in range(len(stages)):
+                for _ in range(workers):
+                    executor.submit(work, index)
+
+            served: Dict[int, tuple] = {}  # seq -> (type, burger), orders served ahead of their turn
+            next_seq = 0
+
+            while True:
+                item = get(queues[-1])
+
+                if item is _DONE:
+                    break
+
+                seq, type, burger = item
+
+                if isinstance(burger, _Failed):
+                    raise burger.error
+
+                if ordered:
+                    served[seq] = (type, burger)
+                    ready = []
+
+                    while next_seq in served:
+                        ready.append(served.pop(next_seq))
+                        next_seq += 1
+                else:
+                    ready = [(type, burger)]
+
+                for type, burger in ready:
+                    yield burger
+                    self.release(type, burger)
+        finally:
+            stop.set()
+            executor.shutdown(wait=True)
+
+
+class AsyncBurgerStore:
+    """
+    The asyncio counterpart of a BurgerStore. It wraps a regular store, so burgers are still created through the
+    store's registry(and its pool, if it has one), but they're made with the awaitable aprepare(), acook() and aserve()
+    hooks, so ordering a burger never blocks the event loop.
+
+    Orders go through an intake queue of at most `queue_size` orders, and `concurrency` workers take orders out of it.
+    So at most `concurrency` burgers are being made at the same time, and when the queue is full, submit() waits for a
+    free spot(backpressure) instead of piling up orders in memory.
+
+    async with AsyncBurgerStore(VeganBurgerStore()) as store:
+        burger = await store.order_burger(Burgers.VEGAN)
+
+    When the store is pooled, give the burger back with `store.store.release(type, burger)` once done with it, like
+    with a regular store(a burger that got cancelled half way through never makes it back to the pool).
+    """
+
+    def __init__(self, store: BurgerStore, concurrency: int = 8, queue_size: int = 64):
+        self.store = store
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def __aenter__(self) -> "AsyncBurgerStore":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(self.queue_size)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def close(self) -> None:
+        """
+        Makes the orders that are already in the queue, then stops the workers.
+        """
+
+        await self._queue.join()
+
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, type: Burgers) -> "asyncio.Future[Burger]":
+        """
+        Puts an order in the intake queue and returns a future for the burger. Waits while the queue is full.
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((type, future))
+
+        return future
+
+    async def order_burger(self, type: Burgers) -> Burger:
+        """
+        Cancelling the returned coroutine cancels the order: if it's still in the queue, it's skipped, if it's already
+        being made, the worker stops making it.
+        """
+
+        future = await self.submit(type)
+
+        return await future
+
+    async def _work(self):
+        while True:
+            type, future = await self._queue.get()
+
+            try:
+                # the client gave up on this order while it was waiting in the queue.
+                if future.cancelled():
+                    continue
+
+                # we make the burger in its own task, so that the client cancelling the order also stops the worker
+                # from making it, without cancelling the worker itself.
+                making = asyncio.ensure_future(self._make(type))
+                future.add_done_callback(lambda f, making=making: f.cancelled() and making.cancel())
+
+                try:
+                    burger = await making
+                except asyncio.CancelledError:
+                    # the worker itself is being cancelled(not just the order), so the client won't get its burger.
+                    if asyncio.current_task().cancelling():
+                        future.cancel()
+                        raise
+
+                    continue
+                except Exception as error:
+                    if not future.done():
+                        future.set_exception(error)
+
+                    continue
+
+                if not future.done():
+                    future.set_result(burger)
+            finally:
+                self._queue.task_done()
+
+    async def _make(self, type: Burgers) -> Burger:
+        burger = self.store.create_burger(type)
+
+        if burger is None:
+            raise ValueError(f"{self.store.__class__.__name__} doesn't sell {type}")
+
+        print(f"--- Making a {burger.get_name()} ---")
+        await burger.aprepare()
+        await burger.acook()
+        await burger.aserve()
+
+        return burger
+
+
+class CheeseBurgerStore(BurgerStore):
+    pass
 
 
 class VeganBurgerStore(BurgerStore):
+    pass
 
-    def create_burger(self, item: Burgers) -> Burger:
-        if item == Burgers.VEGAN:
-            return VeganBurger()
-        elif item == Burgers.DELUXEVEGAN:
-            return DeluxeVeganBurger()
-        else:
-            return None
\ No newline at end of file
+
+CheeseBurgerStore.register(Burgers.CHEESE, CheeseBurger)
+CheeseBurgerStore.register(Burgers.DELUXECHEESE, DeluxeCheeseBurger)
+
+VeganBurgerStore.register(Burgers.VEGAN, VeganBurger)
+VeganBurgerStore.register(Burgers.DELUXEVEGAN, DeluxeVeganBurger)
@@ -0,0 +1,312 @@
+import asyncio
+import contextlib
+import gc
+import io
+import time
+import timeit
+import tracemalloc
+from enum import Enum
+
+from neetcode import (AsyncBurgerStore, Burger, BurgerBatch, BurgerPool, Burgers, BurgerStore, CheeseBurger,
+                      CheeseBurgerStore, CompactBurger)
+
+# Run it from this directory: python neetcode_benchmark.py
+
+SIZES = [4, 100, 1_000, 10_000]
+NUMBER = 100_000
+
+
+def build_store(size: int):
+    items = Enum(f"Burgers{size}", [f"BURGER_{i}" for i in range(size)])
+
+    class BenchmarkBurgerStore(BurgerStore):
+        pass
+
+    for item in items:
+        BenchmarkBurgerStore.register(item, type(f"Burger{item.value}", (CheeseBurger,), {}))
+
+    return BenchmarkBurgerStore(), list(items)
+
+
+def if_elif_chain(store: BurgerStore, item):
+    # what the stores used to do: compare against every burger type until one matches.
+    for key, constructor in store._registry.items():
+        if item == key:
+            return constructor()
+
+    return None
+
+
+def benchmark_registry():
+    """
+    Compares the registry based create_burger() against an if/elif chain, while the number of registered burger types
+    grows. We always order the last registered type, which is the worst case for the chain.
+    """
+
+    print(f"{'types':>8} {'registry (ns/order)':>20} {'if/elif (ns/order)':>20}")
+
+    for size in SIZES:
+        store, items = build_store(size)
+        item = items[-1]
+
+        # the chain gets too slow for big sizes, so it runs fewer rounds there.
+        chain_number = NUMBER // 100 if size > 100 else NUMBER
+
+        registry = timeit.timeit(lambda: store.create_burger(item), number=NUMBER)
+        chain = timeit.timeit(lambda: if_elif_chain(store, item), number=chain_number)
+
+        print(f"{size:>8} {registry / NUMBER * 1e9:>20.0f} {chain / chain_number * 1e9:>20.0f}")
+
+
+def run_orders(store: BurgerStore, orders: int):
+    # order_burger() prints a line per order, we don't want to measure the terminal.
+    with contextlib.redirect_stdout(io.StringIO()):
+        gc.collect()
+        collections = sum(stat["collections"] for stat in gc.get_stats())
+        start = time.perf_counter()
+
+        for i in range(orders):
+            with store.ordered_burger(Burgers.CHEESE if i % 2 else Burgers.DELUXECHEESE):
+                pass
+
+        elapsed = time.perf_counter() - start
+        collections = sum(stat["collections"] for stat in gc.get_stats()) - collections
+
+    return elapsed, collections
+
+
+def benchmark_pool():
+    """
+    Compares the regular order_burger() path, which creates a new burger per order, against the pooled one. The gc
+    column is the number of garbage collector runs during the orders, which is driven by how many objects we allocate
+    and keep alive.
+
+    Note: on CPython a burger without cycles is freed by reference counting as soon as it's dropped, so the regular path
+    doesn't trigger the gc either, and the pool mostly saves allocations, not time.
+    """
+
+    orders = 200_000
+    pool = BurgerPool(max_size=8)
+
+    print(f"\n{'mode':>8} {'orders/s':>12} {'burgers created':>16} {'gc runs':>10}")
+
+    for mode, store in [("new", CheeseBurgerStore()), ("pooled", CheeseBurgerStore(pool=pool))]:
+        elapsed, collections = run_orders(store, orders)
+        created = pool.misses if store.pool else orders
+        print(f"{mode:>8} {orders / elapsed:>12,.0f} {created:>16,} {collections:>10}")
+
+    print(f"pool: {pool.stats()}")
+
+    # the burger an order returns is the caller's until it's released, the next orders don't get it.
+    store = CheeseBurgerStore(pool=BurgerPool())
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        burger = store.order_burger(Burgers.CHEESE)
+        burger.toppings.append("Cheddar")
+        assert store.order_burger(Burgers.CHEESE) is not burger and burger.toppings == ["Cheddar"]
+        store.release(Burgers.CHEESE, burger)
+        assert store.order_burger(Burgers.CHEESE) is burger and burger.toppings == []
+
+
+class SlowBurger(Burger):
+    """
+    A burger with stages that take some time(think of waiting on a grill), the cook() stage being the slowest.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.name = "Slow Burger"
+
+    def prepare(self):
+        time.sleep(0.001)
+
+    def cook(self):
+        time.sleep(0.003)
+
+    def serve(self):
+        time.sleep(0.001)
+
+
+class SlowBurgerStore(BurgerStore):
+    pass
+
+
+SlowBurgerStore.register(Burgers.CHEESE, SlowBurger)
+
+
+def benchmark_pipeline():
+    """
+    Compares making the orders one by one with order_burger() against the order_burgers() pipeline. One by one, an
+    order takes prepare + cook + serve = 5ms. With one worker per stage the pipeline is bound by cook() = 3ms, and with
+    3 workers per stage by cook() / 3 = 1ms.
+    """
+
+    orders = 300
+    store = SlowBurgerStore()
+
+    print(f"\n{'mode':>24} {'orders/s':>10}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+
+        for _ in range(orders):
+            store.order_burger(Burgers.CHEESE)
+
+        sequential = time.perf_counter() - start
+
+    results = [("order_burger", sequential)]
+
+    for workers, ordered in [(1, True), (3, True), (3, False)]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+
+            for _ in store.order_burgers([Burgers.CHEESE] * orders, ordered=ordered, workers=workers):
+                pass
+
+            elapsed = time.perf_counter() - start
+
+        results.append((f"workers={workers} ordered={ordered}", elapsed))
+
+    for mode, elapsed in results:
+        print(f"{mode:>24} {orders / elapsed:>10,.0f}")
+
+
+class AsyncSlowBurger(SlowBurger):
+    async def aprepare(self):
+        await asyncio.sleep(0.001)
+
+    async def acook(self):
+        await asyncio.sleep(0.003)
+
+    async def aserve(self):
+        await asyncio.sleep(0.001)
+
+
+class AsyncSlowBurgerStore(BurgerStore):
+    pass
+
+
+AsyncSlowBurgerStore.register(Burgers.CHEESE, AsyncSlowBurger)
+
+
+async def timed_order(store: AsyncBurgerStore, latencies: list):
+    start = time.perf_counter()
+    await store.order_burger(Burgers.CHEESE)
+    latencies.append(time.perf_counter() - start)
+
+
+def benchmark_async():
+    """
+    Load test of the AsyncBurgerStore: 10k orders are placed at the same time, each one spending 5ms in its stages. The
+    latency of an order includes the time it waited for a spot in the intake queue and for a free worker.
+    """
+
+    orders = 10_000
+
+    print(f"\n{'concurrency':>12} {'orders/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+
+    for concurrency in [10, 100, 1_000]:
+        latencies = []
+
+        async def run():
+            async with AsyncBurgerStore(AsyncSlowBurgerStore(), concurrency=concurrency, queue_size=1_000) as store:
+                await asyncio.gather(*(timed_order(store, latencies) for _ in range(orders)))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            asyncio.run(run())
+            elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1e3
+        p99 = latencies[int(len(latencies) * 0.99)] * 1e3
+
+        print(f"{concurrency:>12} {orders / elapsed:>10,.0f} {p50:>10.1f} {p99:>10.1f}")
+
+
+def cheese_burger(burger: Burger) -> Burger:
+    burger.bread = "Sesame"
+    burger.sauce = "Ketchup"
+    burger.toppings.extend(["Cheddar", "Pickles", "Onion"])
+
+    return burger
+
+
+def measure(build) -> float:
+    tracemalloc.start()
+    kept = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    return size
+
+
+def benchmark_memory():
+    """
+    Bytes per open order(a cheese burger with a bread, a sauce and 3 toppings) for regular burgers, CompactBurger and
+    a BurgerBatch, measured with tracemalloc.
+    """
+
+    orders = 100_000
+
+    def regular():
+        return [cheese_burger(CheeseBurger()) for _ in range(orders)]
+
+    def compact():
+        return [cheese_burger(CompactBurger(CheeseBurger)) for _ in range(orders)]
+
+    def batch():
+        template = cheese_burger(CheeseBurger())
+        burgers = BurgerBatch()
+
+        for _ in range(orders):
+            burgers.append(template)
+
+        return burgers
+
+    CompactBurger(CheeseBurger)  # the template of the kind is created once, don't count it
+
+    print(f"\n{'representation':>16} {'bytes/order':>12}")
+
+    for name, build in [("Burger", regular), ("CompactBurger", compact), ("BurgerBatch", batch)]:
+        print(f"{name:>16} {measure(build) / orders:>12.1f}")
+
+
+def benchmark_batch_writes():
+    """
+    Preparing the burgers of a BurgerBatch in place: n empty cheese burgers are appended, then each one gets a bread, a
+    sauce and 3 toppings through the Burger interface of its view, like a prepare() hook would do. The cost per burger
+    should stay flat as the batch grows. The last column is the final compact() that moves the written toppings back
+    into the flat array.
+    """
+
+    print(f"\n{'burgers':>10} {'write (us/burger)':>18} {'compact (ms)':>13}")
+
+    for n in [10_000, 100_000, 1_000_000]:
+        burgers = BurgerBatch()
+        empty = CheeseBurger()
+
+        for _ in range(n):
+            burgers.append(empty)
+
+        start = time.perf_counter()
+
+        for burger in burgers:
+            cheese_burger(burger)
+
+        written = time.perf_counter()
+        burgers.compact()
+        compacted = time.perf_counter()
+
+        assert burgers[n - 1].toppings == ["Cheddar", "Pickles", "Onion"] and len(burgers.toppings) == 3 * n
+        print(f"{n:>10,} {(written - start) / n * 1e6:>18.2f} {(compacted - written) * 1e3:>13.1f}")
+
+
+if __name__ == "__main__":
+    benchmark_registry()
+    benchmark_pool()
+    benchmark_pipeline()
+    benchmark_async()
+    benchmark_memory()
+    benchmark_batch_writes()
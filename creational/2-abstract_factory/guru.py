@@ -1,4 +1,7 @@
+import copy
 from abc import ABC, abstractmethod
+from itertools import repeat
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
 
 
 # We have two types of products: A & B
@@ -19,6 +22,22 @@ class AbstractProductA(ABC):
     def useful_function_a(self) -> str:
         pass
 
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "AbstractProductA":
+        """
+        Products hold little state, so a deep copy is a new instance with deep copies of its attributes, without the
+        round trip through __reduce_ex__ that copy.deepcopy does by default. Products with state that's cheaper to
+        copy some other way(like a table of immutable values) override it.
+        """
+
+        new = object.__new__(type(self))
+        memo[id(self)] = new
+        state = vars(self)
+
+        if state:
+            new.__dict__.update({name: copy.deepcopy(value, memo) for name, value in state.items()})
+
+        return new
+
 
 class AbstractProductB(ABC):
     """
@@ -44,6 +63,28 @@ class AbstractProductB(ABC):
         """
         pass
 
+    def another_useful_function_b_batch(self, collaborators: Sequence[AbstractProductA]) -> List[str]:
+        """
+        The bulk version of another_useful_function_b(): collaborates with a whole batch of ProductAs in one call.
+        Concrete products can override it with a faster path.
+        """
+
+        return list(map(self.another_useful_function_b, collaborators))
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "AbstractProductB":
+        """
+        See AbstractProductA.__deepcopy__().
+        """
+
+        new = object.__new__(type(self))
+        memo[id(self)] = new
+        state = vars(self)
+
+        if state:
+            new.__dict__.update({name: copy.deepcopy(value, memo) for name, value in state.items()})
+
+        return new
+
 
 ##########################
 
@@ -74,6 +115,19 @@ class AbstractFactory(ABC):
     def create_product_b(self) -> AbstractProductB:
         pass
 
+    def create_family_batch(self, n: int) -> Tuple[List[AbstractProductA], List[AbstractProductB]]:
+        """
+        Creates n families at once and returns the A and B products as two lists, where a[i] and b[i] belong to the
+        same family. The factory methods are looked up once for the whole batch instead of once per product, but they
+        are still called once per product, so it's no faster than calling them in a loop: the point is to keep the
+        families of a batch together. The batch savings are in another_useful_function_b_batch().
+        """
+
+        create_product_a = self.create_product_a
+        create_product_b = self.create_product_b
+
+        return [create_product_a() for _ in repeat(None, n)], [create_product_b() for _ in repeat(None, n)]
+
 
 ##########################
 
@@ -81,12 +135,12 @@ class AbstractFactory(ABC):
 
 class ConcreteProductA1(AbstractProductA):
     def useful_function_a(self) -> str:
-        pass
+        return "The result of the product A1."
 
 
 class ConcreteProductA2(AbstractProductA):
     def useful_function_a(self) -> str:
-        pass
+        return "The result of the product A2."
 
 
 class ConcreteProductB1(AbstractProductB):
@@ -99,12 +153,22 @@ class ConcreteProductB1(AbstractProductB):
     argument.
     """
 
+    # formats the result of a collaboration, for both the scalar and the batch path.
+    _collaboration = "The result of the B1 collaborating with the ({})".format
+
     def another_useful_function_b(self, collaborator: AbstractProductA) -> str:
         result = collaborator.useful_function_a()
-        return f"The result of the B1 collaborating with the ({result})"
+        return self._collaboration(result)
+
+    def another_useful_function_b_batch(self, collaborators: Sequence[AbstractProductA]) -> List[str]:
+        # one list comprehension and one map() for the whole batch, instead of a call to another_useful_function_b()
+        # per collaborator.
+        return list(map(self._collaboration, [collaborator.useful_function_a() for collaborator in collaborators]))
 
 
 class ConcreteProductB2(AbstractProductB):
+    _collaboration = "The result of the B2 collaborating with the ({})".format
+
     def useful_function_b(self) -> str:
         return "The result of the product B2."
 
@@ -115,7 +179,10 @@ class ConcreteProductB2(AbstractProductB):
         AbstractProductA as an argument.
         """
         result = collaborator.useful_function_a()
-        return f"The result of the B2 collaborating with the ({result})"
+        return self._collaboration(result)
+
+    def another_useful_function_b_batch(self, collaborators: Sequence[AbstractProductA]) -> List[str]:
+        return list(map(self._collaboration, [collaborator.useful_function_a() for collaborator in collaborators]))
 
 
 ####################################################
@@ -148,6 +215,179 @@ class ConcreteFactory2(AbstractFactory):
         return ConcreteProductB2()
 
 
+############# Serving products from prebuilt ones #############
+
+class PrototypeFactory(AbstractFactory):
+    """
+    Builds one product of each type with the given factory up front, and then serves clones of them instead of
+    building every product from scratch. Worth it when building a product is more expensive than copying it.
+
+    The clones are deep copies, so a client changing the containers of its product(a list, a dict, ...) doesn't change
+    the prototype or any other clone. They're made by the prototype's __deepcopy__(see AbstractProductA.__deepcopy__()),
+    called directly instead of through copy.deepcopy. For products that are as cheap to build as the ones of
+    ConcreteFactory1 and ConcreteFactory2, building them is still faster than copying them.
+    """
+
+    def __init__(self, factory: AbstractFactory):
+        self._product_a = factory.create_product_a()
+        self._product_b = factory.create_product_b()
+
+    def create_product_a(self) -> AbstractProductA:
+        return self._product_a.__deepcopy__({})
+
+    def create_product_b(self) -> AbstractProductB:
+        return self._product_b.__deepcopy__({})
+
+
+class SharedFactory(AbstractFactory):
+    """
+    Builds one product of each type with the given factory up front, and then hands out the same instances to
+    everyone. Only use it with immutable products, since a change to a product would be seen by all of its users.
+    """
+
+    def __init__(self, factory: AbstractFactory):
+        self._product_a = factory.create_product_a()
+        self._product_b = factory.create_product_b()
+
+    def create_product_a(self) -> AbstractProductA:
+        return self._product_a
+
+    def create_product_b(self) -> AbstractProductB:
+        return self._product_b
+
+
+##########################
+
+############# Lazy products #############
+
+class LazyProductA(AbstractProductA):
+    """
+    A cheap placeholder(a virtual proxy) for a ProductA. The real product is only built on the first method call, so
+    a product that the client never uses is never built.
+    """
+
+    def __init__(self, factory: "LazyFactory", create: Callable[[], AbstractProductA]):
+        self._factory = factory
+        self._create = create
+        self._product: Optional[AbstractProductA] = None
+
+    def _real(self) -> AbstractProductA:
+        if self._product is None:
+            self._product = self._create()
+            self._factory.built += 1
+
+        return self._product
+
+    def useful_function_a(self) -> str:
+        return self._real().useful_function_a()
+
+
+class LazyProductB(AbstractProductB):
+    def __init__(self, factory: "LazyFactory", create: Callable[[], AbstractProductB]):
+        self._factory = factory
+        self._create = create
+        self._product: Optional[AbstractProductB] = None
+
+    def _real(self) -> AbstractProductB:
+        if self._product is None:
+            self._product = self._create()
+            self._factory.built += 1
+
+        return self._product
+
+    def useful_function_b(self) -> str:
+        return self._real().useful_function_b()
+
+    def another_useful_function_b(self, collaborator: AbstractProductA) -> str:
+        return self._real().another_useful_function_b(collaborator)
+
+    def another_useful_function_b_batch(self, collaborators: Sequence[AbstractProductA]) -> List[str]:
+        return self._real().another_useful_function_b_batch(collaborators)
+
+
+class LazyFactory(AbstractFactory):
+    """
+    Hands out lazy placeholders instead of the products of the given factory, and counts how many of them were
+    actually built.
+    """
+
+    def __init__(self, factory: AbstractFactory):
+        self._factory = factory
+        self.created = 0  # placeholders handed out
+        self.built = 0  # placeholders that had to build their real product
+
+    @property
+    def never_built(self) -> int:
+        return self.created - self.built
+
+    def create_product_a(self) -> AbstractProductA:
+        self.created += 1
+        return LazyProductA(self, self._factory.create_product_a)
+
+    def create_product_b(self) -> AbstractProductB:
+        self.created += 1
+        return LazyProductB(self, self._factory.create_product_b)
+
+
+##########################
+
+############# Factory registry #############
+
+class FactoryRegistry:
+    """
+    Instead of the client picking the concrete factory by hand, the factories are registered under a config key(like
+    "variant1") and the registry resolves the key to a factory. A factory is resolved once per key and mode and then
+    cached, so resolving it in a hot path is a single dict lookup.
+
+    The mode says how the factory serves products:
+    - "new": builds a new product on every call(the regular concrete factory).
+    - "prototype": serves clones of prebuilt products, see PrototypeFactory. Only faster than "new" for products that
+      cost more to build than to copy.
+    - "shared": serves the same prebuilt products, see SharedFactory.
+    - "lazy": serves placeholders that only build the product when it's used, see LazyFactory.
+    """
+
+    _modes = {
+        "new": lambda factory: factory,
+        "prototype": PrototypeFactory,
+        "shared": SharedFactory,
+        "lazy": LazyFactory,
+    }
+
+    _factories: Dict[str, Type[AbstractFactory]] = {}  # config key -> concrete factory class
+    _resolved: Dict[Tuple[str, str], AbstractFactory] = {}  # (config key, mode) -> factory
+
+    @classmethod
+    def register(cls, key: str, factory_class: Type[AbstractFactory]) -> None:
+        cls._factories[key] = factory_class
+
+        # a factory resolved for the old class of this key is stale now.
+        for resolved in [resolved for resolved in cls._resolved if resolved[0] == key]:
+            del cls._resolved[resolved]
+
+    @classmethod
+    def resolve(cls, key: str, mode: str = "new") -> AbstractFactory:
+        factory = cls._resolved.get((key, mode))
+
+        if factory is None:
+            if key not in cls._factories:
+                raise KeyError(f"No factory registered for {key!r}")
+
+            if mode not in cls._modes:
+                raise ValueError(f"Unknown mode {mode!r}, expected one of {', '.join(cls._modes)}")
+
+            factory = cls._resolved[(key, mode)] = cls._modes[mode](cls._factories[key]())
+
+        return factory
+
+
+FactoryRegistry.register("variant1", ConcreteFactory1)
+FactoryRegistry.register("variant2", ConcreteFactory2)
+
+
+##########################
+
+
 def client_code(factory: AbstractFactory) -> None:
     """
     The client code works with factories and products only through abstract
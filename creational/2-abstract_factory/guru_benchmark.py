@@ -0,0 +1,162 @@
+import contextlib
+import io
+import time
+
+from guru import (AbstractFactory, ConcreteFactory1, ConcreteProductA1, ConcreteProductB1, FactoryRegistry,
+                  LazyFactory, client_code)
+
+# Run it from this directory: python guru_benchmark.py
+
+CALLS = 200_000
+
+
+class ExpensiveProductA(ConcreteProductA1):
+    """
+    A product that does some real work when it's built, like parsing its config. Its table only holds immutable
+    values, so a copy of the dict is a deep copy of it.
+    """
+
+    def __init__(self):
+        self.table = {i: str(i) for i in range(50)}
+
+    def __deepcopy__(self, memo):
+        new = object.__new__(type(self))
+        new.table = dict(self.table)
+
+        return new
+
+
+class ExpensiveProductB(ConcreteProductB1):
+    def __init__(self):
+        self.table = {i: str(i) for i in range(50)}
+
+    def __deepcopy__(self, memo):
+        new = object.__new__(type(self))
+        new.table = dict(self.table)
+
+        return new
+
+
+class ExpensiveFactory(ConcreteFactory1):
+    def create_product_a(self):
+        return ExpensiveProductA()
+
+    def create_product_b(self):
+        return ExpensiveProductB()
+
+
+FactoryRegistry.register("expensive", ExpensiveFactory)
+
+
+def hot_loop(key: str, mode: str) -> float:
+    # client_code() prints its results, we don't want to measure the terminal.
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+
+        for _ in range(CALLS):
+            client_code(FactoryRegistry.resolve(key, mode))
+
+        return time.perf_counter() - start
+
+
+def by_hand(factory_class) -> float:
+    # what the client did before: pick the factory class by hand and instantiate it on every call.
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+
+        for _ in range(CALLS):
+            factory: AbstractFactory = factory_class()
+            client_code(factory)
+
+        return time.perf_counter() - start
+
+
+def benchmark_family_creation():
+    """
+    Cost of one client_code() call(a family of products plus using them) in a hot loop, with the factory picked by
+    hand and resolved from the registry in each mode. The products of "variant1" are cheap to build, the ones of
+    "expensive" aren't.
+    """
+
+    print(f"{'factory':>10} {'mode':>10} {'ns/call':>10}")
+
+    for key, factory_class in [("variant1", ConcreteFactory1), ("expensive", ExpensiveFactory)]:
+        print(f"{key:>10} {'by hand':>10} {by_hand(factory_class) / CALLS * 1e9:>10.0f}")
+
+        for mode in ["new", "prototype", "shared"]:
+            print(f"{key:>10} {mode:>10} {hot_loop(key, mode) / CALLS * 1e9:>10.0f}")
+
+
+def benchmark_batch():
+    """
+    Creating n families(kept in two lists, like create_family_batch() returns them) and collaborating with all the As,
+    one by one with the scalar methods, and with create_family_batch() plus a single another_useful_function_b_batch()
+    call. Creation and collaboration are timed apart: create_family_batch() still calls a factory method per product,
+    the batch savings are in the collaboration.
+    """
+
+    factory = ConcreteFactory1()
+
+    print(f"\n{'n':>10} {'create (ns/family)':>20} {'batch create':>14} {'collaborate (ns/A)':>20} "
+          f"{'batch collaborate':>18}")
+
+    for n in [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]:
+        start = time.perf_counter()
+        products_a, products_b = [], []
+
+        for _ in range(n):
+            products_a.append(factory.create_product_a())
+            products_b.append(factory.create_product_b())
+
+        created = time.perf_counter()
+        results = [products_b[0].another_useful_function_b(product_a) for product_a in products_a]
+        create, collaborate = created - start, time.perf_counter() - created
+        del products_a, products_b
+
+        start = time.perf_counter()
+        products_a, products_b = factory.create_family_batch(n)
+        created = time.perf_counter()
+        batch_results = products_b[0].another_useful_function_b_batch(products_a)
+        batch_create, batch_collaborate = created - start, time.perf_counter() - created
+
+        assert batch_results == results
+        del results, batch_results, products_a, products_b
+
+        print(f"{n:>10} {create / n * 1e9:>20.0f} {batch_create / n * 1e9:>14.0f} {collaborate / n * 1e9:>20.0f} "
+              f"{batch_collaborate / n * 1e9:>18.0f}")
+
+
+def client_code_b_only(factory: AbstractFactory) -> str:
+    # a path of the client that asks for the whole family, but ends up only using product B.
+    factory.create_product_a()
+    product_b = factory.create_product_b()
+
+    return product_b.useful_function_b()
+
+
+def benchmark_lazy():
+    """
+    Cost per request of a client that only uses product B, with expensive products built eagerly and lazily.
+    """
+
+    requests = 100_000
+    lazy = LazyFactory(ExpensiveFactory())
+
+    print(f"\n{'mode':>10} {'ns/request':>12}")
+
+    for mode, factory in [("eager", ExpensiveFactory()), ("lazy", lazy)]:
+        start = time.perf_counter()
+
+        for _ in range(requests):
+            client_code_b_only(factory)
+
+        elapsed = time.perf_counter() - start
+        print(f"{mode:>10} {elapsed / requests * 1e9:>12.0f}")
+
+    print(f"lazy: {lazy.created:,} products created, {lazy.built:,} built, {lazy.never_built:,} never built")
+
+
+if __name__ == "__main__":
+    benchmark_family_creation()
+    benchmark_batch()
+    benchmark_lazy()
@@ -1,4 +1,11 @@
+import asyncio
+import inspect
+import sys
 from abc import ABC, abstractmethod
+from bisect import bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain, islice, repeat
+from typing import IO, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 
 # Interface
@@ -26,6 +33,161 @@ class Builder(ABC):
         pass
 
 
+class ForkableBuilder(Builder):
+    """
+    A Builder that can be forked, which is what ParallelDirector needs.
+    """
+
+    @abstractmethod
+    def fork(self) -> "ForkableBuilder":
+        """
+        A builder that continues from the product built so far, while this one keeps building its own product.
+        """
+
+    @abstractmethod
+    def merge(self, fork: "ForkableBuilder") -> None:
+        """
+        Adds the parts that were built on `fork` after it was forked, to the product of this builder.
+        """
+
+    @abstractmethod
+    def added_since_fork(self) -> List[str]:
+        """
+        The parts built on this builder since it was forked.
+        """
+
+
+class Parts:
+    """
+    A list of parts that remembers how it was rendered(the parts joined by `separator`), as a rope: a short list of
+    rendered chunks. When parts are added, only the new parts are joined into a new chunk, and small chunks are merged
+    as they pile up(like a binary counter), so rendering a product n parts long costs O(n log n) overall however often
+    it's listed while it's being built, and there are only O(log n) chunks. write_to() streams the chunks as they are,
+    while render() has to join them into one string(O(n) per call, the rope then collapses into that string).
+
+    Parts can also be forked: the fork shares the parts it starts with with the original, and only stores the parts
+    added to it after the fork. The parts are kept as a list of frozen chunks(tuples, which are never changed once
+    created) plus a tail list the new parts go to. Forking freezes the tail and copies the list of chunks, not the
+    parts, and the chunks are merged like the rendered ones, so a fork costs O(log n) however long the chain of forks
+    it comes from, and reading a part is a bisect over the chunks.
+    """
+
+    def __init__(self, separator: str = ", "):
+        self.separator = separator
+        self._chunks: List[Tuple[str, ...]] = []  # the frozen parts, shared with the forks
+        self._ends: List[int] = []  # _ends[i] is the number of parts in _chunks[:i + 1]
+        self._tail: List[str] = []  # the parts added since the last freeze
+        self._forked_at = 0  # how many parts this one started with
+        self._texts: List[str] = []  # the rendering of the first `_rendered_count` parts, in chunks
+        self._rendered_count = 0
+
+    def append(self, part: str) -> None:
+        self._tail.append(part)
+
+    def added_since_fork(self) -> List[str]:
+        return self._parts_from(self._forked_at)
+
+    def fork(self) -> "Parts":
+        self._freeze()
+        fork = Parts(self.separator)
+        fork._chunks = list(self._chunks)
+        fork._ends = list(self._ends)
+        fork._forked_at = len(self)
+        # the rendered chunks are strings, so sharing them only copies the short list of chunks.
+        fork._texts = list(self._texts)
+        fork._rendered_count = self._rendered_count
+
+        return fork
+
+    def _freeze(self) -> None:
+        if not self._tail:
+            return
+
+        chunks, ends = self._chunks, self._ends
+        chunks.append(tuple(self._tail))
+        ends.append(len(self))
+        self._tail = []
+
+        # new tuples are made, the merged chunks may be shared with forks.
+        while len(chunks) > 1 and len(chunks[-2]) <= len(chunks[-1]):
+            last = chunks.pop()
+            chunks[-1] = chunks[-1] + last
+            ends.pop()
+            ends[-1] += len(last)
+
+    def _frozen_len(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def __len__(self) -> int:
+        return self._frozen_len() + len(self._tail)
+
+    def __iter__(self) -> Iterator[str]:
+        return chain(chain.from_iterable(self._chunks), self._tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+
+        if index < 0:
+            index += len(self)
+
+        frozen = self._frozen_len()
+
+        if 0 <= index < frozen:
+            chunk = bisect_right(self._ends, index)
+
+            return self._chunks[chunk][index - (self._ends[chunk - 1] if chunk else 0)]
+
+        if index < 0:
+            raise IndexError("part index out of range")
+
+        return self._tail[index - frozen]
+
+    def _parts_from(self, start: int) -> List[str]:
+        frozen = self._frozen_len()
+
+        if start >= frozen:
+            return self._tail[start - frozen:]
+
+        return list(islice(self, start, None))
+
+    def _render_new_parts(self) -> None:
+        if self._rendered_count == len(self):
+            return
+
+        separator = self.separator
+        texts = self._texts
+        texts.append(separator.join(self._parts_from(self._rendered_count)))
+        self._rendered_count = len(self)
+
+        while len(texts) > 1 and len(texts[-2]) <= len(texts[-1]):
+            last = texts.pop()
+            texts[-1] = texts[-1] + separator + last
+
+    def render(self) -> str:
+        self._render_new_parts()
+
+        if len(self._texts) > 1:
+            self._texts[:] = [self.separator.join(self._texts)]
+
+        return self._texts[0] if self._texts else ""
+
+    def write_to(self, sink: IO[str]) -> None:
+        """
+        Writes the rendering to a file-like sink without joining the rope into one string: the parts added since the
+        last rendering are rendered into the rope, and then its chunks are written as they are.
+        """
+
+        self._render_new_parts()
+        separator = self.separator
+
+        for index, text in enumerate(self._texts):
+            if index:
+                sink.write(separator)
+
+            sink.write(text)
+
+
 class Product1:
     """
     It makes sense to use the Builder pattern only when your products are quite
@@ -37,16 +199,30 @@ class Product1:
     """
 
     def __init__(self):
-        self.parts = []
+        self.parts = Parts()
 
     def add(self, part: str):
         self.parts.append(part)
 
+    def fork(self) -> "Product1":
+        """
+        A new product that starts with the parts of this one and shares them instead of copying them.
+        """
+
+        product = Product1()
+        product.parts = self.parts.fork()
+
+        return product
+
     def list_parts(self) -> None:
-        print(f"Product parts: {', '.join(self.parts)}", end="")
+        self.write_parts(sys.stdout)
+
+    def write_parts(self, sink: IO[str]) -> None:
+        sink.write("Product parts: ")
+        self.parts.write_to(sink)
 
 
-class ConcreteBuilder1(Builder):
+class ConcreteBuilder1(ForkableBuilder):
     """
     The Concrete Builder classes follow the Builder interface and provide
     specific implementations of the building steps. Your program may have
@@ -86,6 +262,29 @@ class ConcreteBuilder1(Builder):
 
         return product
 
+    def fork(self) -> "ConcreteBuilder1":
+        """
+        Snapshots the builder: the returned builder continues from the product built so far, while this builder can
+        keep building its own product. The parts built before the fork are shared by both, so a common prefix of
+        steps is built once and each variant only pays for its own steps.
+        """
+
+        builder = self.__class__()
+        builder._product = self._product.fork()
+
+        return builder
+
+    def merge(self, fork: "ConcreteBuilder1") -> None:
+        """
+        Adds the parts that were built on `fork` after it was forked, to the product of this builder.
+        """
+
+        for part in fork.added_since_fork():
+            self._product.add(part)
+
+    def added_since_fork(self) -> List[str]:
+        return self._product.parts.added_since_fork()
+
     def produce_step_a(self) -> None:
         self._product.add('PartA1')
 
@@ -112,6 +311,7 @@ class Director:
 
     def __init__(self):
         self._builder = None
+        self._compiled: Dict[Tuple[str, ...], Callable[[], None]] = {}  # recipe -> compiled recipe
 
     @property
     def builder(self) -> Builder:
@@ -127,6 +327,9 @@ class Director:
 
         self._builder = builder
 
+        # compiled recipes are bound to the methods of the previous builder.
+        self._compiled = {}
+
     """
     The Director can construct several product variations using the same
     building steps.
@@ -140,6 +343,165 @@ class Director:
         self.builder.produce_step_b()
         self.builder.produce_step_c()
 
+    """
+    A recipe is the sequence of the names of the building steps of a product variation. Instead of looking up every
+    step on the builder each time we build a product, compile() turns a recipe into a function that calls the bound
+    methods of the current builder directly, so the lookups happen once per recipe.
+    """
+
+    def compile(self, recipe: Sequence[str]) -> Callable[[], None]:
+        recipe = tuple(recipe)
+        compiled = self._compiled.get(recipe)
+
+        if compiled is None:
+            namespace = {f"step_{index}": getattr(self.builder, step) for index, step in enumerate(recipe)}
+
+            # the generated function only refers to the steps through the names of the namespace, so no part of the
+            # recipe ends up in the source code.
+            source = "def build():\n" + "".join(f"    step_{index}()\n" for index in range(len(recipe)))
+            exec(source if recipe else "def build():\n    pass\n", namespace)
+
+            compiled = self._compiled[recipe] = namespace["build"]
+
+        return compiled
+
+    def build_many(self, recipe: Sequence[str], n: int) -> List:
+        """
+        Builds n products from the same recipe and returns them. The recipe is compiled once, and each product is
+        retrieved through the builder's `product` property, which resets the builder for the next one.
+        """
+
+        build = self.compile(recipe)
+        get_product = type(self.builder).product.fget
+        builder = self.builder
+        products = []
+        append = products.append
+
+        for _ in repeat(None, n):
+            build()
+            append(get_product(builder))
+
+        return products
+
+
+MINIMAL_VIABLE_PRODUCT = ("produce_step_a",)
+FULL_FEATURED_PRODUCT = ("produce_step_a", "produce_step_b", "produce_step_c")
+
+
+class ParallelDirector(Director):
+    """
+    Some building steps do I/O(fetching assets, rendering sub-parts, ...), and running them one after the other makes
+    the build as slow as the sum of all of them. Here a plan maps each step to the steps it depends on, and steps that
+    don't depend on each other run at the same time.
+
+    So that the steps don't race on the product, each step runs on its own fork of the builder(so the builder has to be
+    a ForkableBuilder), and when all the steps are done, the parts of each fork are merged into the builder in the
+    order of the plan. So the product is the same no matter which step finishes first. Note that a step doesn't see the
+    parts of the steps it depends on, a dependency only means it runs after them.
+
+    plan = {
+        "produce_step_a": [],
+        "produce_step_b": ["produce_step_a"],
+        "produce_step_c": ["produce_step_a"],
+    }
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        super().__init__()
+        self.max_workers = max_workers
+
+    def _check_builder(self) -> None:
+        if not isinstance(self.builder, ForkableBuilder):
+            raise TypeError(f"ParallelDirector needs a ForkableBuilder, got a {type(self.builder).__name__}")
+
+    @staticmethod
+    def _order(plan: Mapping[str, Sequence[str]]) -> List[str]:
+        """
+        The steps of the plan in an order where each step comes after its dependencies(ties keep the plan's order).
+        """
+
+        for step, dependencies in plan.items():
+            for dependency in dependencies:
+                if dependency not in plan:
+                    raise ValueError(f"{step} depends on {dependency}, which is not in the plan")
+
+        order: List[str] = []
+        done = set()
+
+        while len(order) < len(plan):
+            ready = [step for step, dependencies in plan.items()
+                     if step not in done and all(dependency in done for dependency in dependencies)]
+
+            if not ready:
+                raise ValueError(f"The plan has a dependency cycle between {', '.join(set(plan) - done)}")
+
+            order.extend(ready)
+            done.update(ready)
+
+        return order
+
+    def _merge(self, plan: Mapping[str, Sequence[str]], forks: Dict[str, ForkableBuilder]) -> None:
+        for step in plan:
+            self.builder.merge(forks[step])
+
+    def build(self, plan: Mapping[str, Sequence[str]]) -> None:
+        """
+        Runs the plan on a thread pool.
+        """
+
+        self._check_builder()
+        order = self._order(plan)
+        forks = {step: self.builder.fork() for step in order}
+        futures: Dict[str, Future] = {}
+
+        def run(step: str):
+            # the dependencies were submitted before this step, so they're already running or done, and waiting for
+            # them can't use up the pool.
+            for dependency in plan[step]:
+                futures[dependency].result()
+
+            getattr(forks[step], step)()
+
+        with ThreadPoolExecutor(self.max_workers or len(order) or 1) as executor:
+            for step in order:
+                futures[step] = executor.submit(run, step)
+
+            for step in order:
+                futures[step].result()
+
+        self._merge(plan, forks)
+
+    async def abuild(self, plan: Mapping[str, Sequence[str]]) -> None:
+        """
+        Runs the plan on the event loop. Steps that are coroutine functions are awaited, the others run in a thread so
+        they don't block the loop.
+        """
+
+        self._check_builder()
+        order = self._order(plan)
+        forks = {step: self.builder.fork() for step in order}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run(step: str):
+            await asyncio.gather(*(tasks[dependency] for dependency in plan[step]))
+            method = getattr(forks[step], step)
+
+            if inspect.iscoroutinefunction(method):
+                await method()
+            else:
+                await asyncio.to_thread(method)
+
+        for step in order:
+            tasks[step] = asyncio.create_task(run(step))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        self._merge(plan, forks)
+
 
 if __name__ == "__main__":
     """
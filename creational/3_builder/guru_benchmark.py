@@ -0,0 +1,220 @@
+import asyncio
+import time
+import tracemalloc
+
+from guru import FULL_FEATURED_PRODUCT, ConcreteBuilder1, Director, ParallelDirector, Parts
+
+# Run it from this directory: python guru_benchmark.py
+
+
+class NullSink:
+    # a sink that takes the text and drops it, like a socket would send it away.
+    def write(self, text: str) -> None:
+        pass
+
+
+def benchmark_parts():
+    """
+    A product that gets to `size` parts and is listed every `every` added parts while it's being built. Compares
+    joining a plain list on every listing(what Product1 used to do) against Parts.render(), which has to return the
+    whole string, and Parts.write_to(), which streams the rendered chunks to the sink.
+    """
+
+    every = 1_000
+
+    print(f"{'parts':>10} {'list join (s)':>14} {'render (s)':>11} {'write_to (s)':>13}")
+
+    for size in [10_000, 100_000, 300_000]:
+        parts = [f"Part{i}" for i in range(size)]
+
+        start = time.perf_counter()
+        plain = []
+
+        for index, part in enumerate(parts):
+            plain.append(part)
+
+            if index % every == 0:
+                ", ".join(plain)
+
+        joined = time.perf_counter() - start
+
+        timings = []
+
+        for list_parts in [Parts.render, lambda rope: rope.write_to(NullSink())]:
+            start = time.perf_counter()
+            rope = Parts()
+
+            for index, part in enumerate(parts):
+                rope.append(part)
+
+                if index % every == 0:
+                    list_parts(rope)
+
+            timings.append(time.perf_counter() - start)
+
+        print(f"{size:>10} {joined:>14.3f} {timings[0]:>11.3f} {timings[1]:>13.3f}")
+
+
+def benchmark_director():
+    """
+    Products per second of the full featured product, built with the regular Director method plus `builder.product`,
+    and with build_many().
+    """
+
+    n = 300_000
+    builder = ConcreteBuilder1()
+    director = Director()
+    director.builder = builder
+
+    start = time.perf_counter()
+    products = []
+
+    for _ in range(n):
+        director.build_full_featured_product()
+        products.append(builder.product)
+
+    regular = time.perf_counter() - start
+    del products
+
+    start = time.perf_counter()
+    products = director.build_many(FULL_FEATURED_PRODUCT, n)
+    many = time.perf_counter() - start
+    del products
+
+    print(f"\n{'director':>12} {'products/s':>12}")
+    print(f"{'regular':>12} {n / regular:>12,.0f}")
+    print(f"{'build_many':>12} {n / many:>12,.0f}")
+
+
+def build_prefix(builder: ConcreteBuilder1, steps: int):
+    for _ in range(steps):
+        builder.produce_step_a()
+        builder.produce_step_b()
+
+
+def benchmark_forks():
+    """
+    A tree of 10k variants that share a prefix of 2k steps and differ in their last 3 steps. Each variant is built from
+    scratch, and by forking a builder that built the prefix once. Memory is what the variants keep alive.
+    """
+
+    variants = 10_000
+    prefix_steps = 1_000
+
+    def from_scratch():
+        builder = ConcreteBuilder1()
+        products = []
+
+        for _ in range(variants):
+            build_prefix(builder, prefix_steps)
+            builder.produce_step_c()
+            builder.produce_step_a()
+            builder.produce_step_c()
+            products.append(builder.product)
+
+        return products
+
+    def forked():
+        prefix = ConcreteBuilder1()
+        build_prefix(prefix, prefix_steps)
+        products = []
+
+        for _ in range(variants):
+            builder = prefix.fork()
+            builder.produce_step_c()
+            builder.produce_step_a()
+            builder.produce_step_c()
+            products.append(builder.product)
+
+        return products
+
+    print(f"\n{'variants':>12} {'time (s)':>10} {'memory (MB)':>12}")
+
+    for name, build in [("from scratch", from_scratch), ("forked", forked)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        products = build()
+        elapsed = time.perf_counter() - start
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del products
+
+        print(f"{name:>12} {elapsed:>10.3f} {size / 2 ** 20:>12.1f}")
+
+
+class SlowBuilder(ConcreteBuilder1):
+    """
+    A builder whose steps wait 50ms on I/O before adding their part.
+    """
+
+    def produce_step_a(self) -> None:
+        time.sleep(0.05)
+        super().produce_step_a()
+
+    def produce_step_b(self) -> None:
+        time.sleep(0.05)
+        super().produce_step_b()
+
+    def produce_step_c(self) -> None:
+        time.sleep(0.05)
+        super().produce_step_c()
+
+
+class AsyncSlowBuilder(ConcreteBuilder1):
+    async def produce_step_a(self) -> None:
+        await asyncio.sleep(0.05)
+        super().produce_step_a()
+
+    async def produce_step_b(self) -> None:
+        await asyncio.sleep(0.05)
+        super().produce_step_b()
+
+    async def produce_step_c(self) -> None:
+        await asyncio.sleep(0.05)
+        super().produce_step_c()
+
+
+def benchmark_parallel_director():
+    """
+    Building the full featured product with steps that take 50ms each. Sequentially it takes 150ms. When b and c depend
+    on a, it takes 100ms, and when no step depends on another, 50ms.
+    """
+
+    plans = {
+        "b, c after a": {
+            "produce_step_a": [],
+            "produce_step_b": ["produce_step_a"],
+            "produce_step_c": ["produce_step_a"],
+        },
+        "independent": {"produce_step_a": [], "produce_step_b": [], "produce_step_c": []},
+    }
+
+    print(f"\n{'director':>30} {'ms/product':>12} product")
+
+    director = Director()
+    director.builder = SlowBuilder()
+    start = time.perf_counter()
+    director.build_full_featured_product()
+    elapsed = time.perf_counter() - start
+    print(f"{'sequential':>30} {elapsed * 1e3:>12.0f} {list(director.builder.product.parts)}")
+
+    for name, plan in plans.items():
+        parallel = ParallelDirector()
+        parallel.builder = SlowBuilder()
+        start = time.perf_counter()
+        parallel.build(plan)
+        elapsed = time.perf_counter() - start
+        print(f"{'threads, ' + name:>30} {elapsed * 1e3:>12.0f} {list(parallel.builder.product.parts)}")
+
+        parallel.builder = AsyncSlowBuilder()
+        start = time.perf_counter()
+        asyncio.run(parallel.abuild(plan))
+        elapsed = time.perf_counter() - start
+        print(f"{'asyncio, ' + name:>30} {elapsed * 1e3:>12.0f} {list(parallel.builder.product.parts)}")
+
+
+if __name__ == "__main__":
+    benchmark_parts()
+    benchmark_director()
+    benchmark_forks()
+    benchmark_parallel_director()
@@ -1,5 +1,409 @@
 import copy
-from typing import List, Any
+import threading
+from collections import deque
+from collections.abc import MutableMapping, MutableSequence, MutableSet
+from functools import lru_cache
+from itertools import repeat
+from types import FunctionType, MethodType
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+############# Cloning engine #############
+
+# copy.deepcopy is generic: for every object it finds, it looks up how to copy its type, goes through __reduce_ex__,
+# rebuilds the object from the reduced form, ... The cloning engine instead inspects a class once(the first time one
+# of its instances is cloned) and generates a clone function specialized for it, which copies the attributes of the
+# class one by one, with no lookups in between. Types the engine doesn't know are handed over to copy.deepcopy.
+#
+# The memo works the same as the one of copy.deepcopy(id of the original -> its clone, registered before the
+# attributes are cloned), so circular references are cloned once, and both can share the same memo.
+
+_ATOMIC = {type(None), int, float, bool, complex, str, bytes, range, type, type(Ellipsis), type(NotImplemented)}
+
+_cloners: Dict[type, Callable[[Any, Dict[int, Any]], Any]] = {}  # class -> its clone function
+
+
+def clone(obj: Any, memo: Optional[Dict[int, Any]] = None) -> Any:
+    """
+    Deep copies `obj`, like copy.deepcopy(obj, memo) but faster.
+    """
+
+    if memo is None:
+        memo = {}
+
+    return _clone(obj, memo)
+
+
+def _clone(obj: Any, memo: Dict[int, Any]) -> Any:
+    cls = type(obj)
+
+    if cls in _ATOMIC:
+        return obj
+
+    found = memo.get(id(obj), memo)
+
+    if found is not memo:
+        return found
+
+    cloner = _cloners.get(cls)
+
+    if cloner is None:
+        cloner = _cloners[cls] = _make_cloner(cls)
+
+    return cloner(obj, memo)
+
+
+def _clone_list(obj: list, memo: Dict[int, Any]) -> list:
+    new = []
+    memo[id(obj)] = new
+    new.extend([item if type(item) in _ATOMIC else _clone(item, memo) for item in obj])
+
+    return new
+
+
+def _clone_dict(obj: dict, memo: Dict[int, Any]) -> dict:
+    new = {}
+    memo[id(obj)] = new
+
+    for key, value in obj.items():
+        new[_clone(key, memo)] = value if type(value) in _ATOMIC else _clone(value, memo)
+
+    return new
+
+
+def _clone_set(obj: set, memo: Dict[int, Any]) -> set:
+    new = {item if type(item) in _ATOMIC else _clone(item, memo) for item in obj}
+    memo[id(obj)] = new
+
+    return new
+
+
+def _clone_tuple(obj: tuple, memo: Dict[int, Any]) -> tuple:
+    new = tuple([_clone(item, memo) for item in obj])
+
+    # the tuple was cloned meanwhile, through a cycle that runs through one of its items.
+    if id(obj) in memo:
+        return memo[id(obj)]
+
+    # like copy.deepcopy, a tuple whose items didn't need copying is returned as is.
+    if all(map(lambda item, new_item: item is new_item, obj, new)):
+        new = obj
+
+    memo[id(obj)] = new
+
+    return new
+
+
+def _clone_frozenset(obj: frozenset, memo: Dict[int, Any]) -> frozenset:
+    new = frozenset([item if type(item) in _ATOMIC else _clone(item, memo) for item in obj])
+
+    if id(obj) in memo:
+        return memo[id(obj)]
+
+    memo[id(obj)] = new
+
+    return new
+
+
+_cloners.update({list: _clone_list, dict: _clone_dict, set: _clone_set, frozenset: _clone_frozenset,
+                 tuple: _clone_tuple})
+
+
+def uses_cloner(deepcopy: Callable) -> Callable:
+    """
+    Marks a __deepcopy__ method that only delegates to clone(), so that the engine still generates a clone function
+    for its class instead of calling it(which would call clone() again, forever).
+    """
+
+    deepcopy.uses_cloner = True
+
+    return deepcopy
+
+
+@lru_cache(maxsize=None)
+def _is_plain(cls: type) -> bool:
+    """
+    Whether the instances of the class are plain objects whose whole state is their __dict__, which is what the
+    generated clone functions copy.
+    """
+
+    deepcopy = getattr(cls, "__deepcopy__", None)
+
+    return (
+        (deepcopy is None or getattr(deepcopy, "uses_cloner", False))
+        and cls.__reduce_ex__ is object.__reduce_ex__
+        and cls.__reduce__ is object.__reduce__
+        and getattr(cls, "__getstate__", object.__getstate__) is object.__getstate__
+        and not hasattr(cls, "__setstate__")
+        and all("__slots__" not in vars(base) for base in cls.__mro__[:-1])
+        and any("__dict__" in vars(base) for base in cls.__mro__)
+        and cls.__new__ is object.__new__
+    )
+
+
+def _make_cloner(cls: type) -> Callable[[Any, Dict[int, Any]], Any]:
+    if not _is_plain(cls):
+        # copy.deepcopy would call a __deepcopy__ that delegates to clone(), which would send it back here. It's the
+        # case of the subclasses(with __slots__, __getstate__, ...) of a class whose __deepcopy__ uses_cloner.
+        if getattr(getattr(cls, "__deepcopy__", None), "uses_cloner", False):
+            return _clone_reduced
+
+        return copy.deepcopy
+
+    return _Specialized(cls)
+
+
+def _clone_reduced(obj: Any, memo: Dict[int, Any]) -> Any:
+    # what copy.deepcopy does with an object that has no __deepcopy__: copy it through its reduced form.
+    return copy._reconstruct(obj, memo, *obj.__reduce_ex__(4))
+
+
+class _Specialized:
+    """
+    The clone function of a plain class. It can't know the attributes of the class until it sees an instance, so it
+    generates the code on the first call, from the attributes of that instance. Instances with other attributes go
+    through the generic path.
+    """
+
+    def __init__(self, cls: type):
+        self.cls = cls
+        self.fast: Optional[Callable[[Any, Dict[int, Any]], Any]] = None
+
+    def __call__(self, obj: Any, memo: Dict[int, Any]) -> Any:
+        if self.fast is None:
+            self.fast = _cloners[self.cls] = _generate(self.cls, list(obj.__dict__), self.generic)
+
+        return self.fast(obj, memo)
+
+    def generic(self, obj: Any, new: Any, memo: Dict[int, Any]) -> Any:
+        new.__dict__.update({key: _clone(value, memo) for key, value in obj.__dict__.items()})
+
+        return new
+
+
+def _generate(cls: type, attributes: List[str], generic: Callable) -> Callable[[Any, Dict[int, Any]], Any]:
+    lines = [
+        "def clone_instance(obj, memo):",
+        "    new = new_instance(cls)",
+        "    memo[id(obj)] = new",
+        "    state = obj.__dict__",
+        f"    if len(state) != {len(attributes)}:",
+        "        return generic(obj, new, memo)",
+        "    try:",
+    ]
+
+    for index, attribute in enumerate(attributes):
+        lines.append(f"        value_{index} = state[{attribute!r}]")
+
+    lines += [
+        "    except KeyError:",
+        "        return generic(obj, new, memo)",
+        "    new.__dict__.update({",
+    ]
+
+    # atomic values are used as is, without a call.
+    for index, attribute in enumerate(attributes):
+        lines.append(f"        {attribute!r}: value_{index} if type(value_{index}) in atomic else "
+                     f"clone(value_{index}, memo),")
+
+    lines += [
+        "    })",
+        "    return new",
+    ]
+
+    namespace = {"cls": cls, "new_instance": object.__new__, "atomic": _ATOMIC, "clone": _clone, "generic": generic}
+    exec("\n".join(lines), namespace)
+
+    return namespace["clone_instance"]
+
+
+class ClonePlan:
+    """
+    Deep copying the same prototype n times redoes the same work n times: walking the graph, finding out how to copy
+    each type, checking the memo, ... A ClonePlan walks the graph of the prototype once and writes down its shape: which
+    objects to create, and for each one, what goes in it(as positions in a table of all the objects of a clone). Then
+    apply() makes a clone by creating all the objects at once and filling them, mostly with loops that run in C.
+
+    Since all the objects are created before any of them is filled, circular references(like
+    SelfReferencingEntity.parent) just work. The plan is a snapshot: changes to the prototype after the plan is made
+    don't show up in its clones. Prototypes with objects used as dict keys or set items are cloned with clone() instead,
+    since those objects have to be filled before they're hashed, and so are the ones with a tuple that contains itself
+    (through a list, ...), since it can't be created after its items.
+
+    With `share_buffers`, the bytearray and memoryview payloads of the prototype aren't copied, each clone gets a
+    read-only memoryview over them instead, see clone_sharing_buffers().
+    """
+
+    def __init__(self, prototype: Any, share_buffers: bool = False):
+        lists: List[list] = []
+        dicts: List[dict] = []
+        sets: List[set] = []
+        objects: List[Any] = []
+        shared: List[Any] = []  # buffer payloads, when they're shared
+        opaque: List[Any] = []  # objects we don't know how to copy, they go through copy.deepcopy
+        immutables: List[Any] = []  # tuples and frozensets that contain objects to copy, in children first order
+        consts: List[Any] = []
+        const_ids: Dict[int, Any] = {}
+        hashed: List[Any] = []  # dict keys and set items
+        seen = set()
+        # the tuples and frozensets whose items are still being walked. Reaching one of them again means it's in a
+        # cycle, and there's no children first order for it.
+        open_immutables = set()
+        cyclic = False
+
+        # walk the graph without recursion, so deep graphs don't hit the recursion limit.
+        stack = [(prototype, False)]
+
+        while stack:
+            obj, children_done = stack.pop()
+            cls = type(obj)
+
+            if children_done:
+                open_immutables.discard(id(obj))
+                immutables.append(obj)
+                continue
+
+            if id(obj) in seen:
+                cyclic = cyclic or id(obj) in open_immutables
+                continue
+
+            if cls in _ATOMIC or cls in (tuple, frozenset) and all(type(item) in _ATOMIC for item in obj):
+                if id(obj) not in const_ids:
+                    const_ids[id(obj)] = obj
+                    consts.append(obj)
+
+                continue
+
+            seen.add(id(obj))
+
+            if cls is list:
+                lists.append(obj)
+                stack.extend((item, False) for item in obj)
+            elif cls is dict:
+                dicts.append(obj)
+                hashed.extend(obj)
+                stack.extend((item, False) for pair in obj.items() for item in pair)
+            elif cls is set:
+                sets.append(obj)
+                hashed.extend(obj)
+                stack.extend((item, False) for item in obj)
+            elif cls in (tuple, frozenset):
+                if cls is frozenset:
+                    hashed.extend(obj)
+
+                # the tuple is created once its items are, so it goes back on the stack under them.
+                open_immutables.add(id(obj))
+                stack.append((obj, True))
+                stack.extend((item, False) for item in obj)
+            elif _is_plain(cls):
+                objects.append(obj)
+                stack.extend((value, False) for value in obj.__dict__.values())
+            elif share_buffers and cls in (bytearray, memoryview):
+                shared.append(obj)
+            else:
+                opaque.append(obj)
+
+        mutables = lists + dicts + sets + objects
+        order = mutables + shared + opaque + consts + immutables
+        index = {id(obj): position for position, obj in enumerate(order)}
+
+        def positions(items) -> Tuple[int, ...]:
+            return tuple(index[id(item)] for item in items)
+
+        self._prototype = prototype  # keeps the ids of the table valid
+        # apply() hashes the dict keys and set items before it fills the objects, so when one of them is(or holds) a
+        # plain object, whose __hash__ may read its attributes, the clones are made by clone() instead. So are the
+        # ones of prototypes with a tuple in a cycle, which can't be created after its items.
+        self._generic = cyclic or any(map(_holds_plain_object, hashed))
+        self._root = index[id(prototype)]
+        self._lists = [positions(obj) for obj in lists]
+        self._dicts = [(positions(obj.keys()), positions(obj.values())) for obj in dicts]
+        self._sets = [positions(obj) for obj in sets]
+        self._object_classes = [type(obj) for obj in objects]
+        self._objects = [(tuple(obj.__dict__), positions(obj.__dict__.values())) for obj in objects]
+        self._mutable_ids = [id(obj) for obj in mutables + shared]
+        self._shared = shared
+        self._opaque = opaque
+        self._consts = consts
+        self._immutables = [(type(obj), positions(obj)) for obj in immutables]
+
+    def apply(self) -> Any:
+        if self._generic:
+            return clone(self._prototype, {id(buffer): _read_only(buffer) for buffer in self._shared})
+
+        new_instance = object.__new__
+        lists = [[] for _ in self._lists]
+        dicts = [{} for _ in self._dicts]
+        sets = [set() for _ in self._sets]
+        objects = [new_instance(cls) for cls in self._object_classes]
+        table = lists + dicts + sets + objects
+
+        if self._shared:
+            table += [_read_only(buffer) for buffer in self._shared]
+
+        if self._opaque:
+            memo = dict(zip(self._mutable_ids, table))
+            table += [copy.deepcopy(obj, memo) for obj in self._opaque]
+
+        table += self._consts
+        get = table.__getitem__
+
+        for cls, items in self._immutables:
+            table.append(cls(map(get, items)))
+
+        for new, items in zip(lists, self._lists):
+            new.extend(map(get, items))
+
+        for new, (keys, values) in zip(dicts, self._dicts):
+            new.update(zip(map(get, keys), map(get, values)))
+
+        for new, items in zip(sets, self._sets):
+            new.update(map(get, items))
+
+        for new, (names, values) in zip(objects, self._objects):
+            new.__dict__.update(zip(names, map(get, values)))
+
+        return table[self._root]
+
+
+def _holds_plain_object(obj: Any) -> bool:
+    cls = type(obj)
+
+    if cls in (tuple, frozenset):
+        return any(map(_holds_plain_object, obj))
+
+    return cls not in _ATOMIC and _is_plain(cls)
+
+
+def _read_only(buffer) -> memoryview:
+    return memoryview(buffer).toreadonly()
+
+
+def clone_sharing_buffers(prototype: Any) -> Any:
+    """
+    A deep copy of the prototype whose bytearray and memoryview payloads aren't copied byte by byte: the clone gets a
+    read-only memoryview over the prototype's payload instead. It reads like the payload(indexing, slicing, len(),
+    ==, memoryview(), bytes(), ...), but writing to it raises a TypeError. A clone that needs to write replaces it with
+    its own copy, like `clone.payload = bytearray(clone.payload)`.
+
+    Note that the clones see the later writes to the prototype's payload, and that a bytearray can't be resized while
+    clones hold views on it. bytes payloads don't need any of this: they're immutable, so deep copies share them
+    already.
+    """
+
+    return ClonePlan(prototype, share_buffers=True).apply()
+
+
+def clone_many(prototype: Any, n: int, share_buffers: bool = False) -> List[Any]:
+    """
+    n deep copies of the prototype, made from a single ClonePlan.
+    """
+
+    plan = ClonePlan(prototype, share_buffers)
+
+    return [plan.apply() for _ in repeat(None, n)]
+
+
+##########################
 
 
 class SelfReferencingEntity:
@@ -41,6 +445,7 @@ class SomeComponent:
 
         return new_copy
 
+    @uses_cloner
     def __deepcopy__(self, memo=None):
         """
         Create a deep copy. This method will be called whenever someone calls
@@ -57,18 +462,490 @@ class SomeComponent:
         if memo is None:
             memo = {}
 
-        # First, let's create copies of the nested objects.
-        some_list_of_objects = copy.deepcopy(self.some_list_of_objects, memo)
-        some_circular_ref = copy.deepcopy(self.some_circular_ref, memo)
+        # We used to copy the nested objects with copy.deepcopy and then the
+        # whole __dict__ again. The generated clone function of this class does
+        # the same in one pass, see clone().
+        return clone(self, memo)
 
-        # Then, let's clone the object itself, using the prepared clones of the
-        # nested objects.
-        new_copy = self.__class__(
-            self.some_int, some_list_of_objects, some_circular_ref
-        )
-        new_copy.__dict__ = copy.deepcopy(self.__dict__, memo)
 
-        return new_copy
+############# Copy-on-write clones #############
+
+# Most clones are only read, yet a deep copy copies everything up front. A copy-on-write clone instead shares all of
+# its nested objects with its prototype, and an object is only copied when someone writes to it, and then only that
+# object, not the ones around it.
+#
+# Plain lists, dicts and objects can't tell us when they're written to, so the attributes of the clone are wrappers
+# (_CowList, _CowDict, _CowSet and _CowObject) that read and write the shared objects for it. Each clone has a
+# _CowContext that maps the shared objects it wrote to, to its private copies of them, and every read goes through
+# that map. So when a nested object is copied, the objects that point to it don't have to be copied too.
+#
+# The prototype itself is left alone: the clones share the objects of a snapshot of it(a deep copy taken once, see
+# CowPrototype), which nobody else can reach, so nothing changes under them and the prototype keeps its plain lists,
+# dicts and objects.
+#
+# The wrappers are MutableSequence, MutableMapping and MutableSet views, not lists, dicts and sets: they have the
+# operators of their ABC plus the common extras(+, *, |, sort(), copy(), ...), copy and pickle as plain deep copies,
+# but isinstance(clone.some_list_of_objects, list) is False and json can't encode them. Use copy.deepcopy(clone) to
+# get a clone made of plain objects.
+
+
+class _CowContext:
+    __slots__ = ("prototype", "root", "replaced", "private")
+
+    def __init__(self, prototype: Any, root: Any):
+        self.prototype = prototype
+        self.root = root
+        self.replaced: Dict[int, tuple] = {}  # id of a shared object -> (the object, our copy of it)
+        self.private = set()  # ids of the copies that nobody else sees, so we can write to them in place
+
+    def current(self, obj: Any) -> Any:
+        entry = self.replaced.get(id(obj))
+
+        return obj if entry is None else entry[1]
+
+    def writable(self, obj: Any) -> Any:
+        current = self.current(obj)
+
+        if id(current) in self.private:
+            return current
+
+        if type(current) in (list, dict, set):
+            private = type(current)(current)
+        else:
+            private = copy.copy(current)
+
+        # the shared object is kept in the entry, so that its id isn't reused while we map it.
+        self.replaced[id(obj)] = (obj, private)
+        self.private.add(id(private))
+
+        return private
+
+    def wrap(self, value: Any) -> Any:
+        if value is self.prototype or value is self.root:
+            return self.root
+
+        cls = type(value)
+
+        if cls in _ATOMIC:
+            return value
+
+        wrapper = _COW_WRAPPERS.get(cls)
+
+        if wrapper is not None:
+            return wrapper(self, value)
+
+        if _is_plain(cls):
+            return _CowObject(self, value)
+
+        return value
+
+
+def _unwrap(value: Any) -> Any:
+    """
+    The object to store when a wrapper is written into another object. It's shared from now on, so its context can't
+    write to it in place anymore.
+    """
+
+    if isinstance(value, _Cow):
+        current = value._ctx.current(value._data)
+        value._ctx.private.discard(id(current))
+
+        return current
+
+    return value
+
+
+def _unpickle_plain(obj: Any) -> Any:
+    return obj
+
+
+class _Cow:
+    __slots__ = ("_ctx", "_data")
+
+    def __init__(self, ctx: _CowContext, data: Any):
+        object.__setattr__(self, "_ctx", ctx)
+        object.__setattr__(self, "_data", data)
+
+    def __deepcopy__(self, memo):
+        current = self._ctx.current(self._data)
+        found = memo.get(id(current), memo)
+
+        if found is not memo:
+            return found
+
+        return self._deepcopy(current, memo)
+
+    def __reduce_ex__(self, protocol):
+        # pickled as the plain object it stands for, whose references to the clone itself are left as they are.
+        return _unpickle_plain, (copy.deepcopy(self, {id(self._ctx.root): self._ctx.root}),)
+
+    def __repr__(self):
+        return repr(self.__copy__())
+
+
+class _CowList(_Cow, MutableSequence):
+    __slots__ = ()
+    __hash__ = None
+
+    def __getitem__(self, index):
+        data = self._ctx.current(self._data)
+
+        if isinstance(index, slice):
+            return [self._ctx.wrap(item) for item in data[index]]
+
+        return self._ctx.wrap(data[index])
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._ctx.writable(self._data)[index] = [_unwrap(item) for item in value]
+        else:
+            self._ctx.writable(self._data)[index] = _unwrap(value)
+
+    def __delitem__(self, index):
+        del self._ctx.writable(self._data)[index]
+
+    def __len__(self):
+        return len(self._ctx.current(self._data))
+
+    def __iter__(self):
+        wrap = self._ctx.wrap
+
+        for item in self._ctx.current(self._data):
+            yield wrap(item)
+
+    def __eq__(self, other):
+        return self.__copy__() == other
+
+    def insert(self, index, value):
+        self._ctx.writable(self._data).insert(index, _unwrap(value))
+
+    def sort(self, *, key=None, reverse=False):
+        wrap = self._ctx.wrap
+        self._ctx.writable(self._data).sort(key=None if key is None else lambda item: key(wrap(item)),
+                                            reverse=reverse)
+
+    def __add__(self, other):
+        if not isinstance(other, (list, _CowList)):
+            return NotImplemented
+
+        return [*self, *other]
+
+    def __radd__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+
+        return [*other, *self]
+
+    def __mul__(self, n):
+        return self.__copy__() * n
+
+    __rmul__ = __mul__
+
+    def __copy__(self):
+        return list(self)
+
+    copy = __copy__
+
+    def _deepcopy(self, current, memo):
+        new = []
+        memo[id(current)] = new
+        new.extend([copy.deepcopy(item, memo) for item in self])
+
+        return new
+
+
+class _CowDict(_Cow, MutableMapping):
+    __slots__ = ()
+    __hash__ = None
+
+    def __getitem__(self, key):
+        return self._ctx.wrap(self._ctx.current(self._data)[key])
+
+    def __setitem__(self, key, value):
+        self._ctx.writable(self._data)[key] = _unwrap(value)
+
+    def __delitem__(self, key):
+        del self._ctx.writable(self._data)[key]
+
+    def __iter__(self):
+        return iter(self._ctx.current(self._data))
+
+    def __len__(self):
+        return len(self._ctx.current(self._data))
+
+    def __eq__(self, other):
+        return self.__copy__() == other
+
+    def __or__(self, other):
+        if not isinstance(other, (dict, _CowDict)):
+            return NotImplemented
+
+        return {**self, **other}
+
+    def __ror__(self, other):
+        if not isinstance(other, dict):
+            return NotImplemented
+
+        return {**other, **self}
+
+    def __copy__(self):
+        return {key: self[key] for key in self}
+
+    copy = __copy__
+
+    def _deepcopy(self, current, memo):
+        new = {}
+        memo[id(current)] = new
+
+        for key in self:
+            new[copy.deepcopy(key, memo)] = copy.deepcopy(self[key], memo)
+
+        return new
+
+
+class _CowSet(_Cow, MutableSet):
+    """
+    The items of a set are hashable, so they're returned as they are, not wrapped.
+    """
+
+    __slots__ = ()
+    __hash__ = None
+
+    def __contains__(self, item):
+        return item in self._ctx.current(self._data)
+
+    def __iter__(self):
+        return iter(self._ctx.current(self._data))
+
+    def __len__(self):
+        return len(self._ctx.current(self._data))
+
+    def add(self, item):
+        self._ctx.writable(self._data).add(item)
+
+    def discard(self, item):
+        self._ctx.writable(self._data).discard(item)
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return set(iterable)
+
+    def __eq__(self, other):
+        return self._ctx.current(self._data) == other
+
+    def __copy__(self):
+        return set(self)
+
+    copy = __copy__
+
+    def _deepcopy(self, current, memo):
+        new = copy.deepcopy(set(current), memo)
+        memo[id(current)] = new
+
+        return new
+
+
+class _CowObject(_Cow):
+    """
+    Wraps a plain object(like a SelfReferencingEntity). Its methods are bound to the wrapper, so the writes they do to
+    `self` go through the wrapper too.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        data = self._ctx.current(self._data)
+        state = data.__dict__
+
+        if name in state:
+            return self._ctx.wrap(state[name])
+
+        attribute = getattr(type(data), name)
+
+        if isinstance(attribute, FunctionType):
+            return MethodType(attribute, self)
+
+        return getattr(data, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._ctx.writable(self._data), name, _unwrap(value))
+
+    def __delattr__(self, name):
+        delattr(self._ctx.writable(self._data), name)
+
+    def __copy__(self):
+        data = self._ctx.current(self._data)
+        new = object.__new__(type(data))
+        new.__dict__.update({name: self._ctx.wrap(value) for name, value in data.__dict__.items()})
+
+        return new
+
+    def _deepcopy(self, current, memo):
+        new = object.__new__(type(current))
+        memo[id(current)] = new
+        new.__dict__.update({name: copy.deepcopy(self._ctx.wrap(value), memo)
+                             for name, value in current.__dict__.items()})
+
+        return new
+
+
+_COW_WRAPPERS = {list: _CowList, dict: _CowDict, set: _CowSet}
+
+
+class CowPrototype:
+    """
+    Hands out copy-on-write clones of a plain object(like SomeComponent). A clone costs about the same no matter how big
+    the prototype is, since nothing nested is copied until it's written to.
+
+    The clones are made from a snapshot of the prototype: a deep copy taken once, when the CowPrototype is created.
+    Like a ClonePlan, changes made to the prototype afterwards don't show up in the clones, take a new CowPrototype to
+    get them.
+
+    cow_prototype = CowPrototype(component)
+    component_clone = cow_prototype.clone()
+    """
+
+    def __init__(self, prototype: Any):
+        self._snapshot = clone(prototype)
+
+    def clone(self) -> Any:
+        snapshot = self._snapshot
+        new = object.__new__(type(snapshot))
+        ctx = _CowContext(snapshot, new)
+        new.__dict__.update({name: ctx.wrap(value) for name, value in snapshot.__dict__.items()})
+
+        return new
+
+
+##########################
+
+
+############# Prototype registry #############
+
+class _Pool:
+    def __init__(self, prototype: Any, clone: Callable[[Any], Any], low: int, high: int):
+        self.prototype = prototype
+        self.clone = clone
+        self.low = low
+        self.high = high
+        self.ready: Deque[Any] = deque()
+        self.hits = 0
+        self.exhausted = 0  # requests that found the pool empty and had to clone on the spot
+        self.refilled = 0
+        self.errors = 0  # clones that failed in the refill thread
+
+
+class PrototypeRegistry:
+    """
+    Keeps a pool of ready clones per prototype key, so a request gets a clone right away instead of paying for
+    cloning a big prototype on the request path.
+
+    A background thread refills the pools: when a pool drops below its low watermark, it's filled back up to its high
+    watermark. When a pool is empty, the clone is made on the spot, and the pool's `exhausted` counter goes up. A clone
+    that fails in the background is counted in the pool's `errors`(get() raises the error itself when it clones on the
+    spot).
+
+    The thread is started by the first register(), and it keeps the registry alive until close() is called, so call
+    close() once done with the registry, or use it as a context manager:
+
+    with PrototypeRegistry() as registry:
+        registry.register("component", component, low=16, high=64)
+        component_clone = registry.get("component")
+    """
+
+    def __init__(self):
+        self._pools: Dict[str, _Pool] = {}
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "PrototypeRegistry":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def register(self, key: str, prototype: Any, low: int = 8, high: int = 32, deep: bool = True) -> None:
+        """
+        `deep` picks copy.deepcopy or copy.copy(so the prototype's __deepcopy__ or __copy__) to make the clones.
+        """
+
+        if not 0 <= low <= high:
+            raise ValueError(f"Expected 0 <= low <= high, got low={low}, high={high}")
+
+        if self._closed:
+            raise RuntimeError("The registry is closed")
+
+        self._pools[key] = _Pool(prototype, copy.deepcopy if deep else copy.copy, low, high)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refill, name="prototype-registry-refill", daemon=True)
+            self._thread.start()
+
+        self._wake.set()
+
+    def unregister(self, key: str) -> None:
+        del self._pools[key]
+
+    def get(self, key: str) -> Any:
+        pool = self._pools[key]
+
+        try:
+            # deque.popleft() is atomic, so requests don't need a lock against the refill thread.
+            clone = pool.ready.popleft()
+            pool.hits += 1
+        except IndexError:
+            pool.exhausted += 1
+            clone = pool.clone(pool.prototype)
+
+        if len(pool.ready) < pool.low:
+            self._wake.set()
+
+        return clone
+
+    def metrics(self) -> Dict[str, Dict[str, int]]:
+        return {
+            key: {"ready": len(pool.ready), "hits": pool.hits, "exhausted": pool.exhausted, "refilled": pool.refilled,
+                  "errors": pool.errors}
+            for key, pool in list(self._pools.items())
+        }
+
+    def close(self) -> None:
+        """
+        Stops the refill thread. The clones left in the pools can still be taken with get().
+        """
+
+        self._closed = True
+        self._wake.set()
+
+        if self._thread is not None:
+            self._thread.join()
+
+    def _refill(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+
+            if self._closed:
+                return
+
+            for pool in list(self._pools.values()):
+                if len(pool.ready) >= pool.low:
+                    continue
+
+                while len(pool.ready) < pool.high and not self._closed:
+                    try:
+                        new = pool.clone(pool.prototype)
+                    except Exception:
+                        # the pool is retried on the next wake up, the other pools and the thread keep going.
+                        pool.errors += 1
+                        break
+
+                    pool.ready.append(new)
+                    pool.refilled += 1
+
+
+##########################
 
 
 if __name__ == "__main__":
@@ -0,0 +1,276 @@
+import copy
+import pickle
+import time
+import timeit
+import tracemalloc
+
+from guru import (CowPrototype, PrototypeRegistry, SelfReferencingEntity, SomeComponent, clone, clone_many,
+                  clone_sharing_buffers)
+
+# Run it from this directory: python guru_benchmark.py
+
+
+class LegacyComponent(SomeComponent):
+    """
+    SomeComponent with its previous __deepcopy__, which went through copy.deepcopy for the nested objects and then for
+    the whole __dict__.
+    """
+
+    def __deepcopy__(self, memo=None):
+        if memo is None:
+            memo = {}
+
+        some_list_of_objects = copy.deepcopy(self.some_list_of_objects, memo)
+        some_circular_ref = copy.deepcopy(self.some_circular_ref, memo)
+        new_copy = self.__class__(self.some_int, some_list_of_objects, some_circular_ref)
+        new_copy.__dict__ = copy.deepcopy(self.__dict__, memo)
+
+        return new_copy
+
+
+class GenericComponent(SomeComponent):
+    """
+    SomeComponent without a __deepcopy__, so copy.deepcopy copies it the generic way(through __reduce_ex__).
+    """
+
+    __deepcopy__ = None
+
+
+class Leaf:
+    def __init__(self, value: int):
+        self.value = value
+        self.name = f"leaf-{value}"
+        self.tags = ["a", "b"]
+
+
+class Branch:
+    def __init__(self, child):
+        self.child = child
+        self.weights = [1.0, 2.0]
+
+
+def wide(component_class, size: int = 5_000):
+    # one component holding `size` small objects.
+    entity = SelfReferencingEntity()
+    component = component_class(1, [Leaf(i) for i in range(size)], entity)
+    entity.set_parent(component)
+
+    return component
+
+
+def deep(component_class):
+    # one component holding a chain of 200 nested objects.
+    chain = Leaf(0)
+
+    for _ in range(200):
+        chain = Branch(chain)
+
+    entity = SelfReferencingEntity()
+    component = component_class(1, [chain], entity)
+    entity.set_parent(component)
+
+    return component
+
+
+def cyclic(component_class):
+    # one component holding 2k entities whose parent is the component itself.
+    entities = []
+    component = component_class(1, entities, None)
+
+    for _ in range(2_000):
+        entity = SelfReferencingEntity()
+        entity.set_parent(component)
+        entities.append(entity)
+
+    component.some_circular_ref = entities[0]
+
+    return component
+
+
+def benchmark_clone():
+    """
+    Time to deep copy each graph with the previous SomeComponent.__deepcopy__, with the generic copy.deepcopy, and with
+    the generated clone functions(which is also what copy.deepcopy(SomeComponent(...)) uses now).
+    """
+
+    print(f"{'graph':>8} {'legacy __deepcopy__ (ms)':>25} {'generic deepcopy (ms)':>23} {'clone (ms)':>12}")
+
+    for name, build in [("wide", wide), ("deep", deep), ("cyclic", cyclic)]:
+        legacy = build(LegacyComponent)
+        generic = build(GenericComponent)
+        component = build(SomeComponent)
+
+        number = 20
+        legacy_time = timeit.timeit(lambda: copy.deepcopy(legacy), number=number) / number
+        generic_time = timeit.timeit(lambda: copy.deepcopy(generic), number=number) / number
+        clone_time = timeit.timeit(lambda: clone(component), number=number) / number
+
+        print(f"{name:>8} {legacy_time * 1e3:>25.2f} {generic_time * 1e3:>23.2f} {clone_time * 1e3:>12.2f}")
+
+
+def measure_clones(make_clone, n: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    clones = [make_clone() for _ in range(n)]
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # a clone that gets written to, to check that the prototype is left alone.
+    clones[0].some_list_of_objects.append("written")
+    del clones
+
+    return elapsed / n, size / n
+
+
+def benchmark_cow():
+    """
+    Latency and memory per clone of the wide prototype(5k objects), deep cloned and copy-on-write cloned. Deep clones
+    are measured on 100 clones(1M of them wouldn't fit in memory), copy-on-write clones on 1M.
+    """
+
+    prototype = wide(SomeComponent)
+    cow_prototype = CowPrototype(prototype)
+
+    print(f"\n{'clone':>14} {'clones':>10} {'us/clone':>10} {'bytes/clone':>12}")
+
+    for name, make_clone, n in [("deep", lambda: clone(prototype), 100),
+                                ("copy-on-write", cow_prototype.clone, 1_000_000)]:
+        latency, size = measure_clones(make_clone, n)
+        print(f"{name:>14} {n:>10,} {latency * 1e6:>10.1f} {size:>12,.0f}")
+
+    # the prototype is left as it was: plain objects, with their whole API.
+    assert prototype.some_list_of_objects[-1] != "written"
+    assert type(prototype.some_list_of_objects) is list and type(prototype.some_circular_ref) is SelfReferencingEntity
+    assert len(prototype.some_list_of_objects + ["added"]) == len(prototype.some_list_of_objects) + 1
+    assert pickle.loads(pickle.dumps(prototype)).some_int == prototype.some_int
+
+    # and so is a clone: its lists have the list operators, and it pickles as plain objects.
+    cow = cow_prototype.clone()
+    cow.some_list_of_objects.sort(key=lambda leaf: -leaf.value)
+    assert len(cow.some_list_of_objects + ["added"]) == len(["added"] + cow.some_list_of_objects) == 5_001
+    assert cow.some_list_of_objects[0].value == 4_999 and prototype.some_list_of_objects[0].value == 0
+    unpickled = pickle.loads(pickle.dumps(cow))
+    assert type(unpickled.some_list_of_objects) is list and unpickled.some_circular_ref.parent is unpickled
+
+    # a new CowPrototype picks up the changes made to the prototype, the existing one keeps its snapshot.
+    prototype.some_int += 1
+    assert CowPrototype(prototype).clone().some_int == prototype.some_int != cow_prototype.clone().some_int
+
+
+def benchmark_registry():
+    """
+    Latency of getting a clone of a 1k objects prototype on the request path, with a request every 5ms: cloning it on
+    the spot, and getting it from a warm PrototypeRegistry pool.
+    """
+
+    prototype = wide(SomeComponent, 1_000)
+
+    with PrototypeRegistry() as registry:
+        registry.register("wide", prototype, low=8, high=32)
+        time.sleep(0.5)  # let the pool warm up
+
+        print(f"\n{'clone':>10} {'p50 (us)':>10} {'p99 (us)':>10}")
+
+        for name, get in [("on demand", lambda: copy.deepcopy(prototype)), ("registry", lambda: registry.get("wide"))]:
+            latencies = []
+
+            for _ in range(300):
+                start = time.perf_counter()
+                get()
+                latencies.append(time.perf_counter() - start)
+                time.sleep(0.005)
+
+            latencies.sort()
+            print(f"{name:>10} {latencies[150] * 1e6:>10.0f} {latencies[297] * 1e6:>10.0f}")
+
+        print(f"registry: {registry.metrics()['wide']}")
+
+
+def small_cyclic(component_class):
+    # one component holding 20 entities whose parent is the component itself, plus some plain data.
+    component = cyclic(component_class)
+    del component.some_list_of_objects[20:]
+    component.some_list_of_objects.extend([[1, 2, 3], {"a": 1}, {1, 2}])
+
+    return component
+
+
+def benchmark_clone_many():
+    """
+    Making n clones of a cyclic prototype with copy.deepcopy in a loop(through the generic path and through
+    SomeComponent's generated cloner) and with clone_many().
+    """
+
+    print(f"\n{'graph':>14} {'n':>8} {'generic deepcopy (ms)':>23} {'clone loop (ms)':>17} {'clone_many (ms)':>17}")
+
+    for name, build, n in [("cyclic 2k", cyclic, 200), ("cyclic 20", small_cyclic, 20_000)]:
+        generic = build(GenericComponent)
+        component = build(SomeComponent)
+
+        start = time.perf_counter()
+        clones = [copy.deepcopy(generic) for _ in range(n)]
+        generic_time = time.perf_counter() - start
+        del clones
+
+        start = time.perf_counter()
+        clones = [copy.deepcopy(component) for _ in range(n)]
+        loop_time = time.perf_counter() - start
+        del clones
+
+        start = time.perf_counter()
+        clones = clone_many(component, n)
+        many_time = time.perf_counter() - start
+
+        assert all(clone.some_circular_ref.parent is clone for clone in clones)
+        del clones
+
+        print(f"{name:>14} {n:>8,} {generic_time * 1e3:>23.0f} {loop_time * 1e3:>17.0f} {many_time * 1e3:>17.0f}")
+
+
+def benchmark_buffers():
+    """
+    Memory and time for 5 clones of a prototype holding a 100 MB bytearray payload, deep copied and with
+    clone_sharing_buffers(). The last row is a clone that replaced its read-only view with its own copy to write to
+    it, which copies the payload once.
+    """
+
+    size = 100 * 2 ** 20
+    prototype = SomeComponent(1, [bytearray(size), "metadata"], None)
+    n = 5
+
+    def writable_clone():
+        new = clone_sharing_buffers(prototype)
+        payload = new.some_list_of_objects[0] = bytearray(new.some_list_of_objects[0])
+        payload[0] = 1
+
+        return new
+
+    print(f"\n{'clone':>22} {'MB/clone':>10} {'ms/clone':>10}")
+
+    for name, make_clone in [("deepcopy", lambda: copy.deepcopy(prototype)),
+                             ("sharing buffers", lambda: clone_sharing_buffers(prototype)),
+                             ("sharing, then written", writable_clone)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        clones = [make_clone() for _ in range(n)]
+        elapsed = time.perf_counter() - start
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del clones
+
+        print(f"{name:>22} {memory / n / 2 ** 20:>10.1f} {elapsed / n * 1e3:>10.2f}")
+
+    # a shared payload reads like the prototype's.
+    shared = clone_sharing_buffers(prototype).some_list_of_objects[0]
+    assert prototype.some_list_of_objects[0][0] == 0
+    assert shared[0] == 0 and len(shared) == size and shared == prototype.some_list_of_objects[0]
+    assert memoryview(shared).readonly
+
+
+if __name__ == "__main__":
+    benchmark_clone()
+    benchmark_cow()
+    benchmark_registry()
+    benchmark_clone_many()
+    benchmark_buffers()
@@ -1,11 +1,94 @@
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from contextvars import ContextVar
+from multiprocessing.shared_memory import ShareableList
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+
+class SharedField:
+    """
+    An attribute of a singleton whose value lives in shared memory instead of
+    in the instance, so every process sees and changes the same value, instead
+    of each forked worker having its own copy.
+
+    The value can be an int, float, bool, str, bytes or None. The default
+    value fixes how much memory a str or bytes value gets, so a longer value
+    can't be stored later on.
+    """
+
+    def __init__(self, default: Any):
+        self.default = default
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        cls = type(instance)
+
+        return cls._shared_memory[cls._shared_fields[self.name]]
+
+    def __set__(self, instance, value):
+        cls = type(instance)
+        cls._shared_memory[cls._shared_fields[self.name]] = value
+
+
 class SingletonMeta(type):
     """
     The Singleton class can be implemented in different ways in Python. Some
     possible methods include: base class, decorator, metaclass. We will use the
     metaclass because it is best suited for this purpose.
+
+    It's thread-safe: without a lock, two threads could both see that there's
+    no instance yet and both create one(running an expensive `__init__`
+    twice). It uses double-checked locking: once the instance exists, getting
+    it is a plain dict lookup without any lock, and only the first calls take
+    the lock of their class, so creating one singleton doesn't block the
+    others.
+
+    Processes: after a fork, the child gets a copy of every singleton created
+    before the fork, which is wrong for singletons that hold sockets, locks,
+    ... So a class with `per_process = True` gets a new instance in each
+    process(created on its first use in the child). The state a class
+    declares with SharedField attributes, on the other hand, lives in shared
+    memory, so all the workers share one copy of it. Use the class's
+    `shared_lock` for read-modify-write updates across processes. Note that
+    the shared memory and its lock are created with the first instance, and
+    only shared with the processes forked after that, so create it before
+    forking the workers.
+
+    Scopes: a class with a `singleton_registry` attribute keeps its instances
+    in that SingletonRegistry instead of `_instances`, so it can have one
+    instance per thread, request or tenant, held weakly or evicted.
     """
 
+    singleton_registry = None
+
     _instances = {}
+    _locks: Dict[type, threading.RLock] = {}
+    _locks_lock = threading.Lock()
+
+    def __init__(cls, name, bases, namespace, **kwargs):
+        super().__init__(name, bases, namespace, **kwargs)
+
+        # the SharedFields of the class and of its bases -> their index in the shared memory
+        fields = {}
+
+        for base in reversed(cls.__mro__):
+            for field_name, value in vars(base).items():
+                if isinstance(value, SharedField):
+                    fields.setdefault(field_name, len(fields))
+
+        cls._shared_fields = fields
 
     def __call__(cls, *args, **kwargs):
         """
@@ -13,12 +96,357 @@ class SingletonMeta(type):
         the returned instance.
         """
 
-        if cls not in cls._instances:
-            instance = super().__call__(*args, **kwargs)
-            cls._instances[cls] = instance
+        registry = cls.singleton_registry
+
+        if registry is not None:
+            return registry.get(cls, *args, **kwargs)
+
+        # Fast path: the instance already exists.
+        try:
+            return cls._instances[cls]
+        except KeyError:
+            pass
+
+        # looked up on the metaclass, so a `_lock` attribute of the class itself can't shadow it.
+        with type(cls)._lock(cls):
+            # Another thread may have created it while we were waiting.
+            if cls not in cls._instances:
+                cls._instances[cls] = type(cls)._new_instance(cls, *args, **kwargs)
 
         return cls._instances[cls]
 
+    def _new_instance(cls, *args, **kwargs):
+        """
+        Creates an instance of the class, without caching it, once its shared
+        memory is set up. Every way of creating a singleton goes through here.
+        """
+
+        if cls._shared_fields and "_shared_memory" not in vars(cls):
+            with type(cls)._lock(cls):
+                # Another thread may have set it up while we were waiting.
+                if "_shared_memory" not in vars(cls):
+                    type(cls)._create_shared_memory(cls)
+
+        return type.__call__(cls, *args, **kwargs)
+
+    def _create_shared_memory(cls) -> None:
+        """
+        Creates the shared memory that holds the SharedFields of the class,
+        set to their defaults, and its lock. Both are only shared with the
+        processes forked from this one afterwards(the ones started in other
+        ways have their own).
+        """
+
+        fields = {value.name: value for base in cls.__mro__ for value in vars(base).values()
+                  if isinstance(value, SharedField)}
+        defaults = [fields[field_name].default for field_name in cls._shared_fields]
+        # nothing attaches to it by name, so it gets a random one that can't clash with another process's.
+        cls._shared_memory = ShareableList(defaults)
+        cls.shared_lock = multiprocessing.Lock()
+
+    def release_shared_memory(cls) -> None:
+        """
+        Frees the shared memory of the class. Call it once all the processes
+        are done with it.
+        """
+
+        shared_memory = vars(cls).get("_shared_memory")
+
+        if shared_memory is not None:
+            shared_memory.shm.close()
+            shared_memory.shm.unlink()
+            del cls._shared_memory
+
+    @staticmethod
+    def _after_fork_in_child() -> None:
+        # The locks may have been held by threads of the parent, which don't
+        # exist in the child, so they'd never be released.
+        SingletonMeta._locks = {}
+        SingletonMeta._locks_lock = threading.Lock()
+
+        # AsyncSingletonMeta keeps its instances here too.
+        for cls in [cls for cls in SingletonMeta._instances if getattr(cls, "per_process", False)]:
+            del SingletonMeta._instances[cls]
+
+    def _lock(cls) -> threading.RLock:
+        """
+        The lock of this class, created on first use. It's reentrant, so an
+        `__init__` that asks for its own class doesn't deadlock.
+        """
+
+        lock = cls._locks.get(cls)
+
+        if lock is None:
+            with cls._locks_lock:
+                lock = cls._locks.setdefault(cls, threading.RLock())
+
+        return lock
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=SingletonMeta._after_fork_in_child)
+
+
+class AsyncSingletonMeta(SingletonMeta):
+    """
+    A SingletonMeta for singletons that need to `await` something to be
+    ready, like opening a connection pool. Get the instance with
+    `await Class.instance()`, which runs `__init__` and then the class's
+    `async def ainit(self)` once, however many coroutines ask for it at the
+    same time: they all wait for the same initialization.
+
+    The instance is only cached once `ainit` has succeeded. If it raises, all
+    the waiting coroutines get the error and the next call tries again. A
+    waiter that gets cancelled doesn't cancel the initialization for the
+    others. Blocking work inside `ainit` should go through
+    `asyncio.to_thread`, so it doesn't block the event loop.
+    """
+
+    # class -> the task initializing its instance
+    _pending: Dict[type, asyncio.Task] = {}
+
+    def __call__(cls, *args, **kwargs):
+        try:
+            return cls._instances[cls]
+        except KeyError:
+            raise RuntimeError(f"{cls.__name__} isn't initialized yet, use `await {cls.__name__}.instance()`") from None
+
+    async def instance(cls, *args, **kwargs):
+        try:
+            return cls._instances[cls]
+        except KeyError:
+            pass
+
+        loop = asyncio.get_running_loop()
+        task = cls._pending.get(cls)
+
+        # a task of another loop was left behind when its loop was closed.
+        if task is None or task.get_loop() is not loop:
+            task = loop.create_task(type(cls)._initialize(cls, args, kwargs))
+            cls._pending[cls] = task
+
+        return await asyncio.shield(task)
+
+    async def _initialize(cls, args, kwargs):
+        try:
+            # not through SingletonMeta.__call__, which would cache it before it's ready.
+            instance = type(cls)._new_instance(cls, *args, **kwargs)
+            ainit = getattr(instance, "ainit", None)
+
+            if ainit is not None:
+                await ainit()
+
+            cls._instances[cls] = instance
+
+            return instance
+        finally:
+            if cls._pending.get(cls) is asyncio.current_task():
+                del cls._pending[cls]
+
+
+if hasattr(os, "register_at_fork"):
+    # the tasks belong to the event loop of the parent.
+    os.register_at_fork(after_in_child=AsyncSingletonMeta._pending.clear)
+
+
+_threads = threading.local()
+
+
+def _thread_scope() -> object:
+    # a key of its own per thread: thread idents get reused once a thread is done.
+    try:
+        return _threads.scope
+    except AttributeError:
+        _threads.scope = object()
+
+        return _threads.scope
+
+
+# The request and the tenant the current code runs for, see `singleton_scope`.
+current_request: ContextVar[Hashable] = ContextVar("current_request", default=None)
+current_tenant: ContextVar[Hashable] = ContextVar("current_tenant", default=None)
+
+
+@contextlib.contextmanager
+def singleton_scope(request: Hashable = None, tenant: Hashable = None):
+    """
+    Runs the block for the given request and/or tenant, so the singletons in
+    "request" and "tenant" scoped registries are the ones of that request and
+    tenant. Each asyncio task gets its own copy of the context variables.
+    """
+
+    tokens = []
+
+    if request is not None:
+        tokens.append((current_request, current_request.set(request)))
+
+    if tenant is not None:
+        tokens.append((current_tenant, current_tenant.set(tenant)))
+
+    try:
+        yield
+    finally:
+        for variable, token in reversed(tokens):
+            variable.reset(token)
+
+
+class SingletonRegistry:
+    """
+    Keeps the instances of singleton classes per scope, instead of one
+    instance per class for the life of the process:
+
+    - "process": one instance per class, like `SingletonMeta._instances`.
+    - "thread": one instance per class and thread.
+    - "request": one instance per class and `current_request`.
+    - "tenant": one instance per class and `current_tenant`.
+
+    or any function that returns the key of the current scope.
+
+    With `weak=True`, an instance is only kept while something else
+    references it, so the singletons of finished requests and transient
+    classes go away with their last user. With `max_size`, the least recently
+    used instances are evicted once there are more than that(which is also
+    what frees the instances of finished threads in a "thread" registry).
+    Either way, the next call after an instance is gone creates a new one.
+    """
+
+    _scopes: Dict[str, Callable[[], Hashable]] = {
+        "process": lambda: None,
+        "thread": _thread_scope,
+        "request": current_request.get,
+        "tenant": current_tenant.get,
+    }
+
+    # all the registries, so they can be fixed up after a fork.
+    _registries: "weakref.WeakSet[SingletonRegistry]" = weakref.WeakSet()
+
+    def __init__(self, scope: Union[str, Callable[[], Hashable]] = "process", weak: bool = False,
+                 max_size: Optional[int] = None):
+        if isinstance(scope, str):
+            try:
+                scope = self._scopes[scope]
+            except KeyError:
+                raise ValueError(f"unknown scope {scope!r}, expected one of {list(self._scopes)}") from None
+
+        self.scope = scope
+        self.weak = weak
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        # (class, scope key) -> its instance, or a weak reference to it. Least recently used first.
+        self._entries: OrderedDict = OrderedDict()
+        # reentrant, so an `__init__` that asks for another singleton of this registry doesn't deadlock.
+        self._lock = threading.RLock()
+        SingletonRegistry._registries.add(self)
+
+    def get(self, cls, *args, **kwargs):
+        """
+        The instance of `cls` for the current scope, created with the given
+        arguments if there is none.
+        """
+
+        key = (cls, self.scope())
+        # Fast path, without the lock: the instance already exists.
+        entry = self._entries.get(key)
+        instance = entry() if self.weak and entry is not None else entry
+
+        if instance is not None:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                pass  # evicted meanwhile, the caller can still use it.
+
+            self.hits += 1
+
+            return instance
+
+        with self._lock:
+            # Another thread may have created it while we were waiting.
+            entry = self._entries.get(key)
+            instance = entry() if self.weak and entry is not None else entry
+
+            if instance is not None:
+                self.hits += 1
+
+                return instance
+
+            self.misses += 1
+            # not through SingletonMeta.__call__, which would send us back here.
+            instance = type(cls)._new_instance(cls, *args, **kwargs)
+
+            if self.weak:
+                try:
+                    entry = weakref.ref(instance, lambda _, key=key: self._discard(key))
+                except TypeError:
+                    raise TypeError(f"{cls.__name__} instances can't be held weakly, add '__weakref__' to its "
+                                    "__slots__") from None
+            else:
+                entry = instance
+
+            self._entries[key] = entry
+
+            while self.max_size is not None and len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+            return instance
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        The hit/miss/eviction counters, the live instances per class and their
+        memory. The memory is the shallow size of each instance and its
+        `__dict__`, the objects they reference aren't counted.
+        """
+
+        with self._lock:
+            instances = [(cls, entry() if self.weak else entry) for (cls, _), entry in self._entries.items()]
+
+        live: Dict[str, int] = {}
+        size = 0
+
+        for cls, instance in instances:
+            if instance is None:
+                continue
+
+            live[cls.__qualname__] = live.get(cls.__qualname__, 0) + 1
+            attributes = getattr(instance, "__dict__", None)
+            size += sys.getsizeof(instance) + (sys.getsizeof(attributes) if attributes is not None else 0)
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "live": live,
+            "bytes": size,
+        }
+
+    def _discard(self, key) -> None:
+        # the weakly held instance of `key` died. The lock isn't taken: the garbage collector may call us while this
+        # thread holds it. pop() on the dict is atomic, and a newer entry for the key is left alone.
+        entry = self._entries.get(key)
+
+        if entry is not None and entry() is None:
+            self._entries.pop(key, None)
+
+    @staticmethod
+    def _after_fork_in_child() -> None:
+        # Like SingletonMeta._after_fork_in_child: the locks may have been held by threads of the parent, and the
+        # per_process classes get new instances in the child.
+        for registry in list(SingletonRegistry._registries):
+            registry._lock = threading.RLock()
+
+            for key in [key for key in registry._entries if getattr(key[0], "per_process", False)]:
+                del registry._entries[key]
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=SingletonRegistry._after_fork_in_child)
+
 
 class Singleton(metaclass=SingletonMeta):
 
@@ -0,0 +1,321 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+import timeit
+import tracemalloc
+
+from guru import AsyncSingletonMeta, SharedField, SingletonMeta, SingletonRegistry, singleton_scope
+
+# Run it from this directory: python guru_benchmark.py
+
+
+class LegacySingletonMeta(type):
+    """
+    The previous SingletonMeta, without any locking.
+    """
+
+    _instances = {}
+
+    def __call__(cls, *args, **kwargs):
+        if cls not in cls._instances:
+            instance = super().__call__(*args, **kwargs)
+            cls._instances[cls] = instance
+
+        return cls._instances[cls]
+
+
+def stress(metaclass, threads: int = 32, rounds: int = 20):
+    """
+    `threads` threads ask for a new singleton class at the same time, whose `__init__` is slow. Returns how many
+    times `__init__` ran and how many distinct instances the threads got, summed over `rounds` rounds.
+    """
+
+    inits = 0
+    distinct = 0
+
+    for _ in range(rounds):
+        created = []
+
+        class Expensive(metaclass=metaclass):
+            def __init__(self):
+                created.append(self)
+                time.sleep(0.001)  # e.g. opening connections
+
+        barrier = threading.Barrier(threads)
+        instances = []
+
+        def worker():
+            barrier.wait()
+            instances.append(Expensive())
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+
+        for thread in workers:
+            thread.start()
+
+        for thread in workers:
+            thread.join()
+
+        inits += len(created)
+        distinct += len(set(map(id, instances)))
+
+    return inits, distinct
+
+
+def benchmark_lookup(metaclass) -> float:
+    class Lookup(metaclass=metaclass):
+        pass
+
+    Lookup()
+
+    return timeit.timeit(Lookup, number=1_000_000) / 1_000_000
+
+
+class Connection(metaclass=SingletonMeta):
+    """
+    A singleton that must not be shared between processes, like a connection.
+    """
+
+    per_process = True
+
+    def __init__(self):
+        self.pid = os.getpid()
+
+
+class ScopedConnection(Connection):
+    """
+    The same, kept in a registry.
+    """
+
+    singleton_registry = SingletonRegistry()
+    opened = SharedField(0)
+
+    def __init__(self):
+        super().__init__()
+
+        with ScopedConnection.shared_lock:
+            self.opened += 1
+
+
+class Counter(metaclass=SingletonMeta):
+    """
+    A singleton whose state all the processes share.
+    """
+
+    per_process = True
+    hits = SharedField(0)
+    last_worker = SharedField(" " * 16)
+
+    def __init__(self):
+        self.pid = os.getpid()
+
+
+def forked_worker(increments: int, results) -> None:
+    # the lock a fork may have copied while held by a thread of the parent must not block us.
+    connection = Connection()
+    scoped_connection = ScopedConnection()
+    counter = Counter()
+
+    for _ in range(increments):
+        with Counter.shared_lock:
+            counter.hits += 1
+
+    counter.last_worker = f"worker {os.getpid()}"
+    results.put((connection.pid == os.getpid() == scoped_connection.pid, counter.pid == os.getpid()))
+
+
+def check_forked_workers(workers: int = 8, increments: int = 1_000):
+    """
+    Forked workers must each get their own Connection, ScopedConnection and Counter instance, but share the Counter's
+    hits and the ScopedConnection's opened count, which the parent must see too.
+    """
+
+    context = multiprocessing.get_context("fork")
+    Connection()
+    ScopedConnection()
+    counter = Counter()
+    results = context.Queue()
+
+    # a thread of the parent holding the singleton locks while we fork.
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold_lock():
+        with SingletonMeta._lock(Connection), ScopedConnection.singleton_registry._lock:
+            held.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    held.wait()
+
+    processes = [context.Process(target=forked_worker, args=(increments, results)) for _ in range(workers)]
+
+    for process in processes:
+        process.start()
+
+    release.set()
+    holder.join()
+    per_process = [results.get(timeout=30) for _ in processes]
+
+    for process in processes:
+        process.join()
+
+    assert all(own_connection and own_counter for own_connection, own_counter in per_process)
+    assert counter.pid == os.getpid()
+    assert counter.hits == workers * increments, counter.hits
+    assert ScopedConnection().opened == workers + 1, ScopedConnection().opened
+
+    print(f"\n{workers} forked workers: {len(per_process)} per-process instances, shared hits = {counter.hits:,} "
+          f"(expected {workers * increments:,}), last writer: {counter.last_worker.strip()}")
+
+    Counter.release_shared_memory()
+    ScopedConnection.release_shared_memory()
+
+
+def check_async_instance(callers: int = 1_000):
+    """
+    `callers` coroutines await the instance of an async singleton whose initialization takes 100ms and fails the first
+    time. Initialization must run once per attempt, the failed attempt must not be cached, and the event loop must keep
+    running other tasks meanwhile.
+    """
+
+    attempts = []
+
+    class Pool(metaclass=AsyncSingletonMeta):
+        connections = SharedField(0)
+
+        async def ainit(self):
+            attempts.append(self)
+            self.connections += 1
+            await asyncio.sleep(0.1)  # e.g. connecting
+
+            if len(attempts) == 1:
+                raise ConnectionError("database not ready")
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+
+            while True:
+                await asyncio.sleep(0.001)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        failed = await asyncio.gather(*[Pool.instance() for _ in range(callers)], return_exceptions=True)
+        instances = await asyncio.gather(*[Pool.instance() for _ in range(callers)])
+        ticking.cancel()
+
+        return failed, instances, ticks
+
+    start = time.perf_counter()
+    failed, instances, ticks = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+
+    assert all(isinstance(error, ConnectionError) for error in failed)
+    assert len(attempts) == 2 and len(set(map(id, instances))) == 1 and instances[0] is Pool()
+    # the shared memory is set up for the failed attempt, and kept for the next one.
+    assert instances[0].connections == 2
+    Pool.release_shared_memory()
+
+    print(f"\n{callers} concurrent awaits, twice: {len(attempts)} initializations(the first one failed), "
+          f"{len(set(map(id, instances)))} instance, {elapsed * 1e3:.0f}ms, {ticks} ticks of another task meanwhile")
+
+
+def benchmark_scopes(tenants: int = 10_000):
+    """
+    Memory kept alive after serving `tenants` tenants once each, with a 10KB per-tenant singleton: as a SingletonMeta
+    subclass per tenant(kept for the life of the process), and in a "tenant" scoped registry bounded to 100 instances.
+    Plus the lookup cost of an existing instance, and what's left of weakly held per-request singletons once their
+    requests are done.
+    """
+
+    class TenantCache:
+        def __init__(self):
+            self.payload = bytearray(10_000)
+
+    class PerTenantCache(TenantCache, metaclass=SingletonMeta):
+        pass
+
+    class ScopedTenantCache(TenantCache, metaclass=SingletonMeta):
+        singleton_registry = SingletonRegistry("tenant", max_size=100)
+
+    print(f"\n{'tenant singletons':>18} {'kept (MB)':>10} {'lookup (ns)':>12}")
+
+    def subclass_per_tenant():
+        classes = {}
+
+        for tenant in range(tenants):
+            classes[tenant] = type(f"Cache{tenant}", (PerTenantCache,), {})
+            classes[tenant]()
+
+        return classes
+
+    def registry():
+        for tenant in range(tenants):
+            with singleton_scope(tenant=tenant):
+                ScopedTenantCache()
+
+    for name, serve in [("subclass/tenant", subclass_per_tenant), ("scoped registry", registry)]:
+        tracemalloc.start()
+        kept = serve()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del kept
+
+        print(f"{name:>18} {size / 2 ** 20:>10.1f}", end=" ")
+
+        with singleton_scope(tenant=0):
+            cls = type("Cache", (PerTenantCache,), {}) if name == "subclass/tenant" else ScopedTenantCache
+            cls()
+            print(f"{timeit.timeit(cls, number=100_000) / 100_000 * 1e9:>12.0f}")
+
+    print(f"scoped registry: {ScopedTenantCache.singleton_registry.stats()}")
+
+    class RequestContext(metaclass=SingletonMeta):
+        singleton_registry = SingletonRegistry("request", weak=True)
+
+    for request in range(1_000):
+        with singleton_scope(request=request):
+            context = RequestContext()
+            assert RequestContext() is context
+
+    del context
+    stats = RequestContext.singleton_registry.stats()
+    assert not stats["live"] and not RequestContext.singleton_registry._entries
+    print(f"weak request registry after 1,000 requests: {stats}")
+
+    class PerThread(metaclass=SingletonMeta):
+        singleton_registry = SingletonRegistry("thread")
+
+    instances = []
+    threads = [threading.Thread(target=lambda: instances.append((PerThread(), PerThread()))) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert all(first is second for first, second in instances) and len({id(first) for first, _ in instances}) == 8
+    print(f"thread registry, 8 threads: {PerThread.singleton_registry.stats()['live']}")
+
+
+if __name__ == "__main__":
+    print(f"{'metaclass':>20} {'__init__ runs':>14} {'instances':>10} {'lookup (ns)':>12}")
+
+    for metaclass in [LegacySingletonMeta, SingletonMeta]:
+        inits, distinct = stress(metaclass)
+        lookup = benchmark_lookup(metaclass)
+
+        print(f"{metaclass.__name__:>20} {inits:>14} {distinct:>10} {lookup * 1e9:>12.0f}")
+
+    print("(20 rounds of 32 threads: a correct singleton runs __init__ 20 times and gives 20 instances)")
+
+    check_forked_workers()
+    check_async_instance()
+    benchmark_scopes()
@@ -0,0 +1,221 @@
+import itertools
+import random
+import time
+import timeit
+import tracemalloc
+
+import guru_inheritance
+import guru_object_composition
+from translation_cache import TranslationCache
+
+# Run it from this directory: python guru_benchmark.py
+
+
+class Document(guru_object_composition.Adaptee):
+    """
+    An adaptee whose specific_request() does real work, like converting a document to another format. Editing it
+    changes its version.
+    """
+
+    def __init__(self, words: int = 2_000):
+        self.words = [f"word{i}" for i in range(words)]
+        self._version = 0
+
+    def specific_request(self) -> str:
+        return " ".join(self.words)
+
+    def version(self) -> int:
+        return self._version
+
+    def edit(self) -> None:
+        self.words[0] = f"edit{self._version}"
+        self._version += 1
+
+
+class InheritedDocument(Document, guru_inheritance.Adapter):
+    """
+    The same document, adapted through inheritance(Document comes first, so its specific_request() is the one used).
+    """
+
+
+class CachingInheritedDocument(Document, guru_inheritance.CachingAdapter):
+    def __init__(self, cache: TranslationCache):
+        Document.__init__(self)
+        guru_inheritance.CachingAdapter.__init__(self, cache)
+
+
+def benchmark_cache(documents: int = 500, requests: int = 100_000, edit_ratio: float = 0.01):
+    """
+    `requests` requests over `documents` documents, picked at random with a few documents getting most of the requests,
+    and a document edited once every 1/edit_ratio requests. Compares the plain adapters with the caching ones, with
+    a cache that fits every document and one that fits a fifth of them.
+    """
+
+    rng = random.Random(0)
+    # most of the requests go to a few documents.
+    picks = [min(int(rng.paretovariate(1.2)) - 1, documents - 1) for _ in range(requests)]
+    edits = [rng.random() < edit_ratio for _ in range(requests)]
+    adapters = {
+        "composition": lambda document: guru_object_composition.Adapter(document),
+        "composition, cache": lambda document, cache=TranslationCache():
+            guru_object_composition.CachingAdapter(document, cache),
+        "composition, 1/5 cache": lambda document, cache=TranslationCache(documents // 5):
+            guru_object_composition.CachingAdapter(document, cache),
+    }
+
+    print(f"{'adapter':>24} {'requests/s':>12} stats")
+
+    for name, adapt in adapters.items():
+        docs = [Document() for _ in range(documents)]
+        start = time.perf_counter()
+
+        for pick, edit in zip(picks, edits):
+            if edit:
+                docs[pick].edit()
+
+            adapt(docs[pick]).request()
+
+        elapsed = time.perf_counter() - start
+        cache = getattr(adapt(docs[0]), "cache", None)
+        print(f"{name:>24} {requests / elapsed:>12,.0f} {cache.stats() if cache else ''}")
+
+    inherited = {
+        "inheritance": InheritedDocument,
+        "inheritance, cache": lambda cache=TranslationCache():
+            CachingInheritedDocument(cache),
+    }
+
+    for name, create in inherited.items():
+        docs = [create() for _ in range(documents)]
+        start = time.perf_counter()
+
+        for pick, edit in zip(picks, edits):
+            if edit:
+                docs[pick].edit()
+
+            docs[pick].request()
+
+        elapsed = time.perf_counter() - start
+        cache = getattr(docs[0], "cache", None)
+        print(f"{name:>24} {requests / elapsed:>12,.0f} {cache.stats() if cache else ''}")
+
+    # an adaptee that doesn't override version() can't tell when it changes, so it's never cached.
+    cache = TranslationCache()
+    adapter = guru_object_composition.CachingAdapter(guru_object_composition.Adaptee(), cache)
+    assert adapter.request() == adapter.request() == guru_object_composition.Adapter(adapter.adaptee).request()
+    assert cache.stats()["uncached"] == 2 and not cache.stats()["cached"]
+
+
+class Message(guru_object_composition.Adaptee):
+    """
+    An adaptee with its own text, out of `kinds` possible ones.
+    """
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def specific_request(self) -> str:
+        return self.text
+
+
+def messages(n: int, kinds: int):
+    # a stream of n adaptees, created as they're consumed. n=None is an endless stream.
+    text = guru_object_composition.Adaptee().specific_request()
+
+    for i in itertools.islice(itertools.count(), n):
+        yield Message(f"{i % kinds}-{text}")
+
+
+def benchmark_stream(n: int = 1_000_000):
+    """
+    Throughput of adapting a stream of n adaptees one by one(an Adapter per adaptee plus request()) and with
+    Adapter.adapt_stream(), when the adaptees return a few distinct texts and when they all return different ones. The
+    peak memory is of consuming n/10 results as they come, plus of an endless stream cut after n results.
+    """
+
+    print(f"\n{'adaptees':>10} {'distinct':>10} {'adapter':>14} {'results/s':>12} {'peak (KB)':>10}")
+
+    def per_object(adaptees):
+        return (guru_object_composition.Adapter(adaptee).request() for adaptee in adaptees)
+
+    for kinds in [100, n]:
+        for name, adapt in [("per object", per_object), ("adapt_stream", guru_object_composition.Adapter.adapt_stream)]:
+            start = time.perf_counter()
+
+            for _ in adapt(messages(n, kinds)):
+                pass
+
+            elapsed = time.perf_counter() - start
+
+            # measured on another run, tracemalloc slows the allocations down.
+            tracemalloc.start()
+
+            for _ in adapt(messages(n // 10, kinds)):
+                pass
+
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"{n:>10,} {kinds:>10,} {name:>14} {n / elapsed:>12,.0f} {peak / 2 ** 10:>10,.0f}")
+
+    tracemalloc.start()
+    endless = guru_object_composition.Adapter.adapt_stream(messages(None, 100))
+    consumed = sum(1 for _ in itertools.islice(endless, n))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"endless stream: {consumed:,} results consumed with a {peak / 2 ** 10:,.0f} KB peak")
+
+
+class PassThroughComposition(guru_object_composition.Target):
+    """
+    Hand-written adapters for a method that needs no translation.
+    """
+
+    def __init__(self, adaptee: guru_object_composition.Adaptee):
+        self.adaptee = adaptee
+
+    def request(self) -> str:
+        return self.adaptee.specific_request()
+
+
+class PassThroughInheritance(guru_inheritance.Target, guru_inheritance.Adaptee):
+    def request(self) -> str:
+        return self.specific_request()
+
+
+PassThroughGenerated = guru_object_composition.generate_adapter(guru_object_composition.Target,
+                                                                {"request": "specific_request"})
+
+
+def benchmark_generated(number: int = 2_000_000):
+    """
+    Per-call cost of request() through the hand-written adapters(inheritance and composition) and a generated one,
+    for a method that needs no translation and for the translated request() of the guru examples. The first row is
+    calling the adaptee directly, what an adapter can't beat.
+    """
+
+    adaptee = guru_object_composition.Adaptee()
+    cases = [
+        ("adaptee itself", "none", adaptee.specific_request),
+        ("inheritance", "none", PassThroughInheritance().request),
+        ("composition", "none", PassThroughComposition(adaptee).request),
+        ("generated", "none", PassThroughGenerated(adaptee).request),
+        ("inheritance", "reversed", guru_inheritance.Adapter().request),
+        ("composition", "reversed", guru_object_composition.Adapter(adaptee).request),
+        ("generated", "reversed", guru_object_composition.GeneratedAdapter(adaptee).request),
+    ]
+
+    print(f"\n{'adapter':>16} {'translation':>12} {'ns/call':>8}")
+
+    for name, translation, request in cases:
+        elapsed = min(timeit.repeat(request, number=number, repeat=3))
+        print(f"{name:>16} {translation:>12} {elapsed / number * 1e9:>8.1f}")
+
+
+if __name__ == "__main__":
+    benchmark_cache()
+    benchmark_stream()
+    benchmark_generated()
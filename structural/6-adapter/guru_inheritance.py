@@ -1,3 +1,8 @@
+from typing import Hashable, Optional
+
+from translation_cache import TranslationCache
+
+
 class Target:
     """
     The Target defines the domain-specific interface used by the client code.
@@ -17,6 +22,16 @@ class Adaptee:
     def specific_request(self) -> str:
         return ".eetpadA eht fo roivaheb laicepS"
 
+    def version(self) -> Optional[Hashable]:
+        """
+        Changes whenever specific_request() would return something else(like
+        an etag), so the adapters caching its translation know when to redo
+        it. None means the adaptee can't tell, so its translation is never
+        cached: override it to make the adaptee cacheable.
+        """
+
+        return None
+
 
 class Adapter(Target, Adaptee):
     """
@@ -25,9 +40,26 @@ class Adapter(Target, Adaptee):
     """
 
     def request(self) -> str:
+        return self._translate()
+
+    def _translate(self) -> str:
         return f"Adapter: (TRANSLATED) {self.specific_request()[::-1]}"
 
 
+class CachingAdapter(Adapter):
+    """
+    An Adapter whose translation is expensive: it gets the translation from
+    the given TranslationCache, which the caller owns and may share between
+    adapters.
+    """
+
+    def __init__(self, cache: TranslationCache):
+        self.cache = cache
+
+    def request(self) -> str:
+        return self.cache.get(self, Adapter._translate)
+
+
 def client_code(target: Target) -> None:
     """
     The client code supports all classes that follow the Target interface.
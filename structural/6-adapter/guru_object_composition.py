@@ -1,3 +1,11 @@
+import inspect
+import keyword
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from translation_cache import TranslationCache
+
+
 class Target:
     """
     The Target defines the domain-specific interface used by the client code.
@@ -20,6 +28,16 @@ class Adaptee:
     def specific_request(self) -> str:
         return ".eetpadA eht fo roivaheb laicepS"
 
+    def version(self) -> Optional[Hashable]:
+        """
+        Changes whenever specific_request() would return something else(like
+        an etag), so the adapters caching its translation know when to redo
+        it. None means the adaptee can't tell, so its translation is never
+        cached: override it to make the adaptee cacheable.
+        """
+
+        return None
+
 
 class Adapter(Target):
     """
@@ -34,7 +52,125 @@ class Adapter(Target):
         self.adaptee = adaptee
 
     def request(self) -> str:
-        return f"Adapter: (TRANSLATED) {self.adaptee.specific_request()[::-1]}"
+        return self._translate_text(self.adaptee.specific_request())
+
+    @classmethod
+    def adapt_stream(cls, adaptees: Iterable[Adaptee], chunk_size: int = 1024) -> Iterator[str]:
+        """
+        The request() results of many adaptees, without an adapter object per
+        adaptee. The adaptees are read and translated `chunk_size` at a time
+        through translate_batch(), so memory stays bounded by one chunk even
+        when `adaptees` is an endless generator.
+        """
+
+        adaptees = iter(adaptees)
+
+        while True:
+            chunk = list(islice(adaptees, chunk_size))
+
+            if not chunk:
+                return
+
+            yield from cls.translate_batch(chunk)
+
+    @classmethod
+    def translate_batch(cls, adaptees: List[Adaptee]) -> List[str]:
+        """
+        The translations of a chunk of adaptees, in order. Adaptees whose
+        specific_request() returns the same thing share one translation.
+        Override it with a vectorized version when the translation allows it.
+        """
+
+        texts = [adaptee.specific_request() for adaptee in adaptees]
+        translations = {text: cls._translate_text(text) for text in set(texts)}
+
+        return list(map(translations.__getitem__, texts))
+
+    @classmethod
+    def _translate(cls, adaptee: Adaptee) -> str:
+        return cls._translate_text(adaptee.specific_request())
+
+    @staticmethod
+    def _translate_text(text: str) -> str:
+        return f"Adapter: (TRANSLATED) {text[::-1]}"
+
+
+class CachingAdapter(Adapter):
+    """
+    An Adapter for adaptees whose translation is expensive: it gets the
+    translation from the given TranslationCache, which the caller owns and
+    may share between adapters.
+    """
+
+    def __init__(self, adaptee: Adaptee, cache: TranslationCache):
+        super().__init__(adaptee)
+        self.cache = cache
+
+    def request(self) -> str:
+        return self.cache.get(self.adaptee, self._translate)
+
+
+def generate_adapter(target: type, mapping: Dict[str, Union[str, Tuple[str, Callable[[Any], Any]]]],
+                     name: Optional[str] = None) -> type:
+    """
+    Builds an adapter class from a mapping of the Target's methods to the
+    Adaptee's, instead of writing it by hand. A method mapped to the name of
+    an adaptee method needs no translation: the adapter's `__init__` sets it
+    to the adaptee's bound method, so calling it calls the adaptee directly.
+    A method mapped to (adaptee method, translate) returns the translation of
+    the adaptee method's result, through a generated method that is as cheap
+    as a hand-written one.
+
+        GeneratedAdapter = generate_adapter(Target, {"request": ("specific_request", translate)})
+        client_code(GeneratedAdapter(adaptee))
+    """
+
+    namespace = {}
+    init = ["def __init__(self, adaptee):\n", "    self.adaptee = adaptee\n"]
+    methods = []
+    translated = []
+
+    for index, (target_method, spec) in enumerate(mapping.items()):
+        adaptee_method, translate = (spec, None) if isinstance(spec, str) else spec
+
+        # the names end up in the generated code, so they must be plain identifiers.
+        for method_name in [target_method, adaptee_method]:
+            if not method_name.isidentifier() or keyword.iskeyword(method_name) or method_name == "adaptee":
+                raise ValueError(f"{method_name!r} can't be the name of an adapted method")
+
+        if not callable(getattr(target, target_method, None)):
+            raise ValueError(f"{target.__name__} has no method {target_method!r}")
+
+        if translate is None:
+            init.append(f"    self.{target_method} = adaptee.{adaptee_method}\n")
+            continue
+
+        parameters = list(inspect.signature(getattr(target, target_method)).parameters.values())[1:]
+
+        # the exact parameters of the Target's method when they're simple, so no *args tuple is built per call.
+        if all(parameter.kind is parameter.POSITIONAL_OR_KEYWORD and parameter.default is parameter.empty
+               for parameter in parameters):
+            arguments = ", ".join(parameter.name for parameter in parameters)
+        else:
+            arguments = "*args, **kwargs"
+
+        namespace[f"translate_{index}"] = translate
+        translated.append(target_method)
+        methods.append(f"def {target_method}(self, {arguments}):\n"
+                       f"    return translate_{index}(self.adaptee.{adaptee_method}({arguments}))\n")
+
+    exec("".join(init) + "".join(methods), namespace)
+
+    name = name or f"Generated{target.__name__}Adapter"
+    attributes = {key: namespace[key] for key in ["__init__", *translated]}
+
+    for method in attributes.values():
+        method.__qualname__ = f"{name}.{method.__name__}"
+
+    return type(name, (target,), attributes)
+
+
+GeneratedAdapter = generate_adapter(Target, {"request": ("specific_request", Adapter._translate_text)})
 
 
 def client_code(target: Target) -> None:
@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class TranslationCache:
+    """
+    The translated results of up to `max_size` adaptees, so adapting an
+    adaptee that hasn't changed since its last translation is a dict lookup
+    instead of a new translation. A result is reused as long as the adaptee's
+    version() is the same, and the least recently used ones are evicted.
+    Adaptees whose version() is None are translated every time.
+
+    The cached adaptees are kept alive until they're evicted or the cache is
+    dropped, so size it for the adapters that share it. It's used by the
+    caching adapters of both guru_object_composition and guru_inheritance.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.evicted = 0
+        self.uncached = 0
+        # id(adaptee) -> (adaptee, its version, its translation). The adaptee is kept so its id can't be reused.
+        self._entries: OrderedDict[int, Tuple[Any, Hashable, str]] = OrderedDict()
+
+    def get(self, adaptee: Any, translate: Callable[[Any], str]) -> str:
+        version = adaptee.version()
+
+        if version is None:
+            self.uncached += 1
+
+            return translate(adaptee)
+
+        key = id(adaptee)
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if entry[1] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+                return entry[2]
+
+            self.invalidated += 1
+
+        self.misses += 1
+        result = translate(adaptee)
+        self._entries[key] = (adaptee, version, result)
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            "evicted": self.evicted,
+            "uncached": self.uncached,
+            "cached": len(self._entries),
+        }